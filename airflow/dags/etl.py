@@ -1,20 +1,36 @@
 from airflow import DAG
 from airflow.operators.python import PythonOperator
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'scripts')))
 
+# Jumlah proses worker untuk parsing halaman PDF (1 = serial)
+EKSTRAK_WORKERS = int(os.environ.get("EKSTRAK_WORKERS", "1"))
+# Backend teks PDF: pdfplumber | pypdfium2 | pymupdf
+EKSTRAK_BACKEND = os.environ.get("EKSTRAK_BACKEND", "pdfplumber")
+# Folder PDF untuk mode batch (kosong = satu file default) dan jumlah dokumen paralel
+EKSTRAK_INPUT_DIR = os.environ.get("EKSTRAK_INPUT_DIR") or None
+EKSTRAK_DOC_WORKERS = int(os.environ.get("EKSTRAK_DOC_WORKERS", "1"))
+# Jumlah proses untuk cleansing & chunking sharded (1 = serial)
+CLEANSING_WORKERS = int(os.environ.get("CLEANSING_WORKERS", "1"))
+CHUNK_WORKERS = int(os.environ.get("CHUNK_WORKERS", "1"))
+# Jumlah proses embedding CPU (1 = satu proses; >1 = pool worker, tiap worker dipin ke potongan core)
+EMBED_WORKERS = int(os.environ.get("EMBED_WORKERS", "1"))
+# Backend encoder: torch | onnx | onnx-int8
+EMBED_BACKEND = os.environ.get("ENCODER_BACKEND", "torch")
+
 
 # Import fungsi dari file Python lain
 from ekstrak import run_ekstrak
 from cleansing import run_cleansing
 from chunking import run_chunk
+from dedup import run_dedup
 
 def generate_embeddings_wrapper():
     from generate_embedding import generate_embeddings  
-    generate_embeddings()
+    generate_embeddings(workers=EMBED_WORKERS, backend=EMBED_BACKEND)
 from insert_to_milvus import insert_to_milvus
 
 with DAG(
@@ -27,22 +43,38 @@ with DAG(
 
     ekstrak_task = PythonOperator(
         task_id="ekstrak_pdf",
-        python_callable=run_ekstrak
+        python_callable=run_ekstrak,
+        op_kwargs={
+            "workers": EKSTRAK_WORKERS,
+            "backend": EKSTRAK_BACKEND,
+            "input_dir": EKSTRAK_INPUT_DIR,
+            "doc_workers": EKSTRAK_DOC_WORKERS,
+        }
     )
 
     cleansing_task = PythonOperator(
         task_id="cleansing",
-        python_callable=run_cleansing
+        python_callable=run_cleansing,
+        op_kwargs={"workers": CLEANSING_WORKERS}
     )
 
     chunk_task = PythonOperator(
         task_id="chunk",
-        python_callable=run_chunk
+        python_callable=run_chunk,
+        op_kwargs={"workers": CHUNK_WORKERS}
+    )
+
+    dedup_task = PythonOperator(
+        task_id="dedup",
+        python_callable=run_dedup
     )
 
     generate_embeddings_task = PythonOperator(
     task_id="generate_embeddings",
     python_callable=generate_embeddings_wrapper,
+    # Retry melanjutkan dari checkpoint window terakhir, bukan encode ulang dari awal
+    retries=2,
+    retry_delay=timedelta(minutes=1),
     )
 
     insert_to_milvus_task = PythonOperator(
@@ -50,7 +82,7 @@ with DAG(
         python_callable=insert_to_milvus
     )
 
-    ekstrak_task >> cleansing_task >> chunk_task >> generate_embeddings_task >> insert_to_milvus_task
+    ekstrak_task >> cleansing_task >> chunk_task >> dedup_task >> generate_embeddings_task >> insert_to_milvus_task
 
 
 globals()["dag"] = dag
@@ -0,0 +1,80 @@
+import argparse
+import time
+
+import jsonl_io
+from chunking import chunk_texts_by_token
+
+
+# Benchmark chunking lama (tokenisasi per halaman + tokenizer.decode per chunk) vs batch dengan
+# offset slicing pada file hasil cleansing. Teks chunk baru diambil dari content asli, jadi bisa beda
+# dengan hasil decode (spasi, normalisasi tokenizer); jumlah chunk per halaman harus tetap sama.
+# Contoh:
+#   python scripts/bench_chunking.py data/processed/<dokumen>/<dokumen>_ekstrak_cleansing.jsonl --batch-size 64
+
+def legacy_chunk_by_token(text, tokenizer, max_tokens=450, overlap=50):
+    inputs = tokenizer(
+        text,
+        return_overflowing_tokens=True,
+        max_length=max_tokens,
+        stride=overlap,
+        truncation=True,
+        add_special_tokens=False
+    )
+    return [tokenizer.decode(chunk, skip_special_tokens=True).strip() for chunk in inputs["input_ids"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunking per halaman vs batch")
+    parser.add_argument("input", help="JSONL hasil cleansing")
+    parser.add_argument("--model", default="BAAI/bge-m3")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-tokens", type=int, default=450)
+    parser.add_argument("--overlap", type=int, default=50)
+    args = parser.parse_args()
+
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    texts = [row.get("content", "") for row in jsonl_io.iter_jsonl(args.input)]
+
+    start_time = time.perf_counter()
+    per_page = [legacy_chunk_by_token(text, tokenizer, max_tokens=args.max_tokens, overlap=args.overlap)
+                for text in texts]
+    per_page_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    batched = []
+    for i in range(0, len(texts), args.batch_size):
+        batched.extend(chunk_texts_by_token(texts[i:i + args.batch_size], tokenizer,
+                                            max_tokens=args.max_tokens, overlap=args.overlap))
+    batched_time = time.perf_counter() - start_time
+
+    assert [len(chunks) for chunks in per_page] == [len(chunks) for chunks in batched], \
+        "Jumlah chunk per halaman berbeda dengan chunking lama"
+
+    # Bandingkan teks chunk: decode vs potongan content asli
+    n_chunks = sum(map(len, batched))
+    differ = whitespace_only = 0
+    example = None
+    for old_chunks, new_chunks in zip(per_page, batched):
+        for old_text, (new_text, _, _) in zip(old_chunks, new_chunks):
+            if old_text == new_text:
+                continue
+            differ += 1
+            if old_text.split() == new_text.split():
+                whitespace_only += 1
+            elif example is None:
+                example = (old_text, new_text)
+
+    print(f"{len(texts)} pages, {n_chunks} chunks (fast tokenizer: {getattr(tokenizer, 'is_fast', False)})")
+    print(f"per page (decode) : {len(texts) / per_page_time:10,.0f} pages/s ({per_page_time:.2f} s)")
+    print(f"batched (offsets) : {len(texts) / batched_time:10,.0f} pages/s ({batched_time:.2f} s)")
+    print(f"speedup           : {per_page_time / batched_time:.1f}x")
+    print(f"text diff         : {differ} / {n_chunks} chunks berbeda dari hasil decode "
+          f"({whitespace_only} hanya beda spasi)")
+    if example:
+        print(f"  decode : {example[0][:120]!r}")
+        print(f"  offset : {example[1][:120]!r}")
+
+
+if __name__ == "__main__":
+    main()
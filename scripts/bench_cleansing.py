@@ -0,0 +1,94 @@
+import argparse
+import json
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from cleansing import Cleaner
+
+
+# Benchmark engine cleansing: implementasi lama (regex per baris) vs Cleaner, di atas JSONL sintetis.
+# Contoh:
+#   python scripts/bench_cleansing.py --pages 20000
+
+def legacy_is_noise_line(line):
+    if not line.strip():
+        return True
+    if re.search(r"\.{5,}", line):
+        return False
+    non_alpha = len(re.findall(r"[^a-zA-Z0-9\s]", line))
+    ratio = non_alpha / max(1, len(line))
+    return ratio > 0.5
+
+
+def legacy_clean_text(text):
+    clean_lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if legacy_is_noise_line(line):
+            continue
+        if re.search(r"Edisi ke\s*:|Revisi ke\s*:|Tanggal Berlaku|Paraf", line, re.IGNORECASE):
+            continue
+        line = re.sub(r"(?<=[a-zA-Z])_(?=[a-zA-Z])", "", line)
+        line = re.sub(r"[_\-]{3,}", "", line)
+        line = re.sub(r"[ \t]+", " ", line)
+        clean_lines.append(line)
+    cleaned_text = "\n".join(clean_lines)
+    cleaned_text = re.sub(r"\n{2,}", "\n", cleaned_text)
+    return cleaned_text.strip()
+
+
+def make_synthetic_jsonl(path, n_pages, lines_per_page=40, seed=7):
+    rng = random.Random(seed)
+    words = ["pegawai", "talenta", "PLN", "nilai", "kinerja", "jabatan", "Pasal", "ayat", "(1)", "Tabel", "2023", "grade"]
+    specials = [
+        "Edisi ke : 01", "Revisi ke: 02", "Tanggal Berlaku : 1 Januari 2023", "Paraf",
+        "BAB I ........................ 3", "------------------", "*** ### ***", "", "   ",
+        "nama_pegawai   dan\tjabatan", "Direktur ____ Utama", "•  •  •",
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        for page in range(1, n_pages + 1):
+            lines = []
+            for _ in range(lines_per_page):
+                if rng.random() < 0.2:
+                    lines.append(rng.choice(specials))
+                else:
+                    lines.append("  ".join(rng.choice(words) for _ in range(rng.randint(3, 14))))
+            f.write(json.dumps({"page_number": page, "content": "\n".join(lines)}, ensure_ascii=False) + "\n")
+
+
+def run(clean, input_path):
+    lines = 0
+    results = []
+    start_time = time.perf_counter()
+    with open(input_path, "r", encoding="utf-8") as f:
+        for row in map(json.loads, f):
+            lines += row["content"].count("\n") + 1
+            results.append(clean(row["content"]))
+    return lines, time.perf_counter() - start_time, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cleansing engine")
+    parser.add_argument("--pages", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = Path(tmp_dir) / "synthetic_ekstrak.jsonl"
+        make_synthetic_jsonl(input_path, args.pages)
+
+        lines, legacy_time, legacy_results = run(legacy_clean_text, input_path)
+        _, cleaner_time, cleaner_results = run(Cleaner().clean, input_path)
+
+    assert legacy_results == cleaner_results, "Output Cleaner berbeda dengan implementasi lama"
+
+    print(f"Synthetic JSONL: {args.pages} pages, {lines} lines")
+    print(f"legacy  : {lines / legacy_time:12,.0f} lines/s ({legacy_time:.2f} s)")
+    print(f"Cleaner : {lines / cleaner_time:12,.0f} lines/s ({cleaner_time:.2f} s)")
+    print(f"speedup : {legacy_time / cleaner_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import difflib
+import json
+import time
+from pathlib import Path
+
+from ekstrak import extract_pdf_detailed_bookmarks
+
+
+# Benchmark side-by-side backend ekstraksi + laporan diff field content/bookmark.
+# Contoh:
+#   python scripts/bench_ekstrak_backend.py "data/raw/PDF_ATURAN_HC/dokumen.pdf" --backends pdfplumber pypdfium2
+
+def load_pages(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return {entry["page_number"]: entry for entry in map(json.loads, f)}
+
+
+def diff_outputs(base_path, other_path, base_name, other_name):
+    """Bandingkan dua JSONL hasil ekstraksi per halaman. Return (ringkasan, baris laporan)."""
+    base = load_pages(base_path)
+    other = load_pages(other_path)
+
+    summary = {"pages": len(base | other), "only_base": 0, "only_other": 0, "bookmark_diff": 0, "content_diff": 0}
+    report = []
+
+    for page_num in sorted(base.keys() | other.keys()):
+        a, b = base.get(page_num), other.get(page_num)
+        if b is None:
+            summary["only_base"] += 1
+            report.append(f"[page {page_num}] hanya ada di {base_name}")
+            continue
+        if a is None:
+            summary["only_other"] += 1
+            report.append(f"[page {page_num}] hanya ada di {other_name}")
+            continue
+
+        if a["bookmark"] != b["bookmark"]:
+            summary["bookmark_diff"] += 1
+            report.append(f"[page {page_num}] bookmark: {a['bookmark']!r} -> {b['bookmark']!r}")
+
+        if a["content"] != b["content"]:
+            summary["content_diff"] += 1
+            report.append(f"[page {page_num}] content berbeda:")
+            report.extend(difflib.unified_diff(
+                a["content"].splitlines(), b["content"].splitlines(),
+                fromfile=base_name, tofile=other_name, lineterm="", n=1
+            ))
+
+    return summary, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark & diff backend ekstraksi PDF")
+    parser.add_argument("pdf", help="Path file PDF")
+    parser.add_argument("--backends", nargs="+", default=["pdfplumber", "pypdfium2"])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output-dir", default=None, help="Default: folder bench_backend di samping PDF")
+    args = parser.parse_args()
+
+    pdf_path = Path(args.pdf)
+    output_dir = Path(args.output_dir) if args.output_dir else pdf_path.parent / "bench_backend"
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    outputs = {}
+    timings = {}
+    for backend in args.backends:
+        output_path = output_dir / f"{pdf_path.stem}_{backend}.jsonl"
+        start_time = time.time()
+        extract_pdf_detailed_bookmarks(str(pdf_path), str(output_path), workers=args.workers, backend=backend)
+        timings[backend] = time.time() - start_time
+        outputs[backend] = output_path
+
+    base_name = args.backends[0]
+    print("\n=== Benchmark ===")
+    for backend, elapsed in timings.items():
+        speedup = timings[base_name] / elapsed if elapsed else float("inf")
+        print(f"{backend:<12} {elapsed:8.2f} s  ({speedup:.2f}x vs {base_name})")
+
+    print("\n=== Diff content/bookmark ===")
+    for other_name in args.backends[1:]:
+        summary, report = diff_outputs(outputs[base_name], outputs[other_name], base_name, other_name)
+        report_path = output_dir / f"{pdf_path.stem}_diff_{base_name}_vs_{other_name}.txt"
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(report) + "\n")
+
+        identical = not any(summary[key] for key in ("only_base", "only_other", "bookmark_diff", "content_diff"))
+        status = "IDENTIK" if identical else "BERBEDA"
+        print(f"{base_name} vs {other_name}: {status} {summary}")
+        print(f"  Laporan: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
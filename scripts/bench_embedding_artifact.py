@@ -0,0 +1,63 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import jsonl_io
+from bench_jsonl_io import make_rows
+from embedding_artifact import iter_embedding_batches, meta_path_for, write_embedding_artifact
+
+
+# Benchmark ukuran file & waktu baca artifact embedding: JSONL lama (vektor sebagai teks)
+# vs .npy float32 / float16 + metadata JSONL.
+# Contoh:
+#   python scripts/bench_embedding_artifact.py --rows 5000 --dim 1024
+
+def timed(fn):
+    start_time = time.perf_counter()
+    fn()
+    return time.perf_counter() - start_time
+
+
+def load_jsonl_like_insert(path):
+    # Cara insert_to_milvus lama: semua baris + vektor jadi list Python
+    documents = jsonl_io.read_jsonl(path)
+    return [doc["embedding"] for doc in documents]
+
+
+def iterate_artifact(path, batch_size):
+    for _, vectors in iter_embedding_batches(path, batch_size=batch_size):
+        vectors.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark artifact embedding JSONL vs npy")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.dim)
+    embeddings = np.array([row.pop("embedding") for row in rows], dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        jsonl_path = os.path.join(tmp_dir, "embedding.jsonl")
+        jsonl_io.write_jsonl(jsonl_path, ({**row, "embedding": vector} for row, vector in zip(rows, embeddings)))
+        jsonl_size = os.path.getsize(jsonl_path)
+        jsonl_time = timed(lambda: load_jsonl_like_insert(jsonl_path))
+        print(f"{args.rows} rows x {args.dim} dim")
+        print(f"jsonl   : {jsonl_size / 1e6:8.1f} MB | load {jsonl_time:6.2f} s")
+
+        for dtype in ("float32", "float16"):
+            vectors_path = os.path.join(tmp_dir, f"embedding_{dtype}.npy")
+            write_embedding_artifact(vectors_path, embeddings, rows, dtype=dtype)
+            size = os.path.getsize(vectors_path) + os.path.getsize(meta_path_for(vectors_path))
+            load_time = timed(lambda: iterate_artifact(vectors_path, args.batch_size))
+            print(f"{dtype} : {size / 1e6:8.1f} MB | load {load_time:6.2f} s | "
+                  f"{jsonl_size / size:4.1f}x smaller, {jsonl_time / load_time:4.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import time
+
+import numpy as np
+
+import jsonl_io
+from generate_embedding import EMBED_MODEL, encode_texts
+
+
+# Benchmark scaling pool embedding CPU: 1/2/4/8 worker pada file chunk yang sama.
+# Contoh:
+#   python scripts/bench_embedding_pool.py data/processed/<dokumen>/<dokumen>_ekstrak_chunked.jsonl --limit 2000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scaling embedding pool")
+    parser.add_argument("input", help="JSONL hasil chunking")
+    parser.add_argument("--model", default=EMBED_MODEL)
+    parser.add_argument("--workers", default="1,2,4,8", help="daftar jumlah worker, dipisah koma")
+    parser.add_argument("--limit", type=int, default=1000, help="jumlah chunk yang di-encode")
+    args = parser.parse_args()
+
+    texts = [row["text"] for row in jsonl_io.iter_jsonl(args.input)][:args.limit]
+    results = []
+    reference = None
+    for workers in map(int, args.workers.split(",")):
+        start_time = time.perf_counter()
+        embeddings, stats = encode_texts(texts, model_name=args.model, workers=workers)
+        total_time = time.perf_counter() - start_time
+
+        if reference is None:
+            reference = embeddings
+        max_diff = float(np.abs(embeddings - reference).max()) if len(texts) else 0.0
+        results.append((workers, stats, total_time, max_diff))
+
+    base_time = results[0][1]["encode_time"]
+    print(f"\n{len(texts)} chunks, {results[0][1]['tokens']:,} tokens")
+    print(f"{'workers':>7} {'encode s':>9} {'total s':>8} {'tokens/s':>10} {'speedup':>8} {'max diff':>9}")
+    for workers, stats, total_time, max_diff in results:
+        encode_time = stats["encode_time"]
+        print(f"{workers:>7} {encode_time:>9.2f} {total_time:>8.2f} {stats['tokens'] / encode_time:>10,.0f} "
+              f"{base_time / encode_time:>7.2f}x {max_diff:>9.2e}")
+
+
+if __name__ == "__main__":
+    main()
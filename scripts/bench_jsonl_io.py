@@ -0,0 +1,58 @@
+import argparse
+import json
+import random
+import time
+
+import jsonl_io
+
+
+# Benchmark encode/decode file embedding: json bawaan vs jsonl_io (orjson kalau terpasang).
+# Contoh:
+#   python scripts/bench_jsonl_io.py --rows 5000 --dim 1024
+
+def make_rows(n_rows, dim, seed=3):
+    rng = random.Random(seed)
+    return [
+        {
+            "embedding": [rng.uniform(-0.1, 0.1) for _ in range(dim)],
+            "text": f"Pasal {i} ayat (1) pegawai PLN wajib mengikuti penilaian talenta. " * 8,
+            "file_name": "Kepdir 0306 Kepdir 2023.pdf",
+            "page_number": i // 4 + 1,
+            "bookmark": "BAB II KETENTUAN UMUM",
+            "text_length": 520,
+            "has_tables": False,
+            "chapter_title": "Ketentuan Umum",
+        }
+        for i in range(n_rows)
+    ]
+
+
+def timed(fn):
+    start_time = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSONL codec")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1024)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.dim)
+
+    stdlib_lines, stdlib_dump = timed(lambda: [json.dumps(row, ensure_ascii=False) for row in rows])
+    codec_lines, codec_dump = timed(lambda: [jsonl_io.dumps(row) for row in rows])
+    stdlib_rows, stdlib_load = timed(lambda: [json.loads(line) for line in stdlib_lines])
+    codec_rows, codec_load = timed(lambda: [jsonl_io.loads(line) for line in codec_lines])
+
+    assert stdlib_rows == rows and codec_rows == rows, "Round-trip tidak sama dengan data asli"
+
+    mb = sum(map(len, codec_lines)) / 1e6
+    print(f"Codec: {'orjson' if jsonl_io.orjson else 'json (fallback)'}, {args.rows} rows x {args.dim} dim, {mb:.1f} MB")
+    print(f"dumps : stdlib {stdlib_dump:6.2f} s | jsonl_io {codec_dump:6.2f} s | {stdlib_dump / codec_dump:5.1f}x")
+    print(f"loads : stdlib {stdlib_load:6.2f} s | jsonl_io {codec_load:6.2f} s | {stdlib_load / codec_load:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import random
+import timeit
+
+from ekstrak import find_table_lines_to_skip
+
+
+# Micro-benchmark deduplikasi baris tabel pada halaman sintetis dengan tabel padat.
+# Contoh:
+#   python scripts/bench_table_dedup.py
+
+def table_lines_to_skip_naive(tables, lines):
+    """Implementasi lama (scan row x line x cell) sebagai pembanding."""
+    table_lines_to_skip = set()
+    for table in tables:
+        if table and len(table) > 1:
+            for row in table[1:]:
+                non_empty_cells = [cell.strip() for cell in row if cell and cell.strip()]
+                if len(non_empty_cells) >= 2:
+                    for line in lines:
+                        line_clean = line.strip()
+                        if line_clean:
+                            cells_in_line = sum(1 for cell in non_empty_cells if cell in line_clean)
+                            if cells_in_line == len(non_empty_cells) and len(line_clean.split()) <= len(non_empty_cells) + 2:
+                                table_lines_to_skip.add(line_clean)
+    return table_lines_to_skip
+
+
+def make_dense_page(n_tables=3, n_rows=60, n_cols=5, n_text_lines=120, seed=42):
+    rng = random.Random(seed)
+    words = ["pegawai", "talenta", "nilai", "kinerja", "jabatan", "unit", "grade", "ya", "tidak", "PLN"]
+
+    tables = []
+    lines = []
+    for t in range(n_tables):
+        header = [f"Kolom {c + 1}" for c in range(n_cols)]
+        table = [header]
+        lines.append(f"Tabel {t + 1} Data Pegawai")
+        lines.append(" ".join(header))
+        for r in range(n_rows):
+            row = [f"{rng.choice(words)}{r}" if c else str(r + 1) for c in range(n_cols)]
+            if rng.random() < 0.1:
+                row[rng.randrange(1, n_cols)] = None
+            table.append(row)
+            lines.append(" ".join(cell for cell in row if cell))
+        tables.append(table)
+
+    for _ in range(n_text_lines):
+        lines.append(" ".join(rng.choice(words) for _ in range(rng.randint(4, 12))))
+    rng.shuffle(lines)
+    return tables, lines
+
+
+def main():
+    tables, lines = make_dense_page()
+    expected = table_lines_to_skip_naive(tables, lines)
+    result = find_table_lines_to_skip(tables, lines)
+    assert result == expected, "Hasil indexed matcher berbeda dengan implementasi lama"
+
+    repeat = 20
+    naive_time = timeit.timeit(lambda: table_lines_to_skip_naive(tables, lines), number=repeat) / repeat
+    indexed_time = timeit.timeit(lambda: find_table_lines_to_skip(tables, lines), number=repeat) / repeat
+
+    print(f"Halaman sintetis: {len(lines)} baris, {sum(len(t) - 1 for t in tables)} row tabel, {len(expected)} baris di-skip")
+    print(f"naive   : {naive_time * 1000:8.2f} ms/halaman")
+    print(f"indexed : {indexed_time * 1000:8.2f} ms/halaman")
+    print(f"speedup : {naive_time / indexed_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
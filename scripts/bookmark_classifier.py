@@ -0,0 +1,152 @@
+import re
+import sys
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+
+# --- Klasifikasi heading/bookmark bersama untuk ekstrak.py dan cleansing.py ---
+# Semua pola digabung jadi satu regex alternation dengan named group dan di-compile sekali
+# saat import, jadi deteksi heading cukup satu pemanggilan regex per baris.
+
+class BookmarkMatch(NamedTuple):
+    kind: str                  # main_chapter | appendix | section | subsection | lettered_section | daftar_isi
+    keyword: Optional[str]     # "BAB" / "LAMPIRAN" / "BAGIAN" (uppercase), None untuk jenis lain
+    number: Optional[str]      # nomor bab/lampiran/subbab atau huruf ("A.")
+    title: str
+
+
+# Pola per-jenis versi lama, urutannya = prioritas. Dipakai sebagai referensi regression check.
+BOOKMARK_PATTERNS = [
+    (r"^(BAB|Bab|bab)\s+([IVXLCDM]+|\d+)(\.|:)?\s*(.*)$", "main_chapter"),
+    (r"^(LAMPIRAN|Lampiran|lampiran)\s+([IVXLCDM]+|\d+|\w+)(\.|:)?\s*(.*)$", "appendix"),
+    (r"^(BAGIAN|Bagian|bagian)\s+([IVXLCDM]+|\d+)(\.|:)?\s*(.*)$", "section"),
+    (r"^(\d+\.\d+\.?\d*)\s+(.+)$", "subsection"),
+    (r"^([A-Z]\.|[a-z]\.)\s+(.+)$", "lettered_section"),
+    # Removed overly generic title_section pattern
+    # (r"^([A-Z][A-Z\s]{8,})$", "title_section")
+]
+
+# Heading pada teks hasil ekstraksi PDF (ekstrak.py)
+HEADING_RE = re.compile(
+    r"^(?:"
+    r"(?P<main_chapter>(?P<bab_kw>BAB|Bab|bab)\s+(?P<bab_num>[IVXLCDM]+|\d+)(?:\.|:)?\s*(?P<bab_title>.*))$"
+    r"|(?P<appendix>(?P<app_kw>LAMPIRAN|Lampiran|lampiran)\s+(?P<app_num>[IVXLCDM]+|\d+|\w+)(?:\.|:)?\s*(?P<app_title>.*))$"
+    r"|(?P<section>(?P<sec_kw>BAGIAN|Bagian|bagian)\s+(?P<sec_num>[IVXLCDM]+|\d+)(?:\.|:)?\s*(?P<sec_title>.*))$"
+    r"|(?P<subsection>(?P<sub_num>\d+\.\d+\.?\d*)\s+(?P<sub_title>.+))$"
+    r"|(?P<lettered_section>(?P<letter>[A-Z]\.|[a-z]\.)\s+(?P<letter_title>.+))$"
+    r")"
+)
+
+# Baris daftar isi: "BAB I PENDAHULUAN ........ 1" atau "1.2 Tujuan ....... 3"
+TOC_LINE_RE = re.compile(
+    r"^(?:(?:BAB|Bab|bab)\s+[IVXLCDM\d]+.*\.+\s+\d+|\d+(?:\.\d+)+.*\.+\s+\d+)$"
+)
+
+# Heading pada teks hasil cleansing (input sudah di-uppercase)
+CLEANSED_HEADING_RE = re.compile(
+    r"(?P<daftar_isi>(?-i:\bDAFTAR\s+ISI\b))"
+    r"|\bBAB[\s\.]*(?P<bab_num>[A-Z0-9]+)[\s:.-]*(?P<bab_title>.*)",
+    re.IGNORECASE
+)
+
+# Kesalahan OCR umum "BABI" -> "BAB I"
+BABI_RE = re.compile(r"\bBABI\b", re.IGNORECASE)
+
+# Nama group (keyword, number, title) untuk tiap jenis pada HEADING_RE
+_HEADING_GROUPS = {
+    "main_chapter": ("bab_kw", "bab_num", "bab_title"),
+    "appendix": ("app_kw", "app_num", "app_title"),
+    "section": ("sec_kw", "sec_num", "sec_title"),
+    "subsection": (None, "sub_num", "sub_title"),
+    "lettered_section": (None, "letter", "letter_title"),
+}
+
+
+def normalize_heading(line):
+    return BABI_RE.sub("BAB I", line)
+
+
+def classify_heading(line):
+    """Klasifikasi satu baris teks ekstraksi. Return BookmarkMatch (title sudah di-strip) atau None."""
+    match = HEADING_RE.match(line)
+    if match is None:
+        return None
+
+    kind = match.lastgroup
+    keyword_group, number_group, title_group = _HEADING_GROUPS[kind]
+    keyword = match.group(keyword_group).upper() if keyword_group else None
+    return BookmarkMatch(kind, keyword, match.group(number_group), (match.group(title_group) or "").strip())
+
+
+def is_toc_line(line):
+    return TOC_LINE_RE.match(line) is not None
+
+
+def classify_cleansed_heading(stripped_upper):
+    """Klasifikasi baris hasil cleansing yang sudah di-strip & uppercase. Title dikembalikan apa adanya."""
+    match = CLEANSED_HEADING_RE.match(stripped_upper)
+    if match is None:
+        return None
+    if match.group("daftar_isi"):
+        return BookmarkMatch("daftar_isi", None, None, "")
+    return BookmarkMatch("main_chapter", "BAB", match.group("bab_num"), match.group("bab_title"))
+
+
+# --- Regression check terhadap pola lama ---
+# python scripts/bookmark_classifier.py [corpus.txt]
+
+CORPUS_PATH = Path(__file__).with_name("heading_corpus.txt")
+
+
+def _legacy_classify_heading(line):
+    for pattern, bookmark_type in BOOKMARK_PATTERNS:
+        match = re.match(pattern, line)
+        if match:
+            if bookmark_type in ("main_chapter", "appendix", "section"):
+                title = match.group(4).strip() if match.group(4) else ""
+                return BookmarkMatch(bookmark_type, match.group(1).upper(), match.group(2), title)
+            return BookmarkMatch(bookmark_type, None, match.group(1), match.group(2).strip())
+    return None
+
+
+def _legacy_is_toc_line(line):
+    return bool(
+        re.match(r"^(BAB|Bab|bab)\s+[IVXLCDM\d]+.*\.+\s+\d+$", line) or
+        re.match(r"^\d+(\.\d+)+.*\.+\s+\d+$", line)
+    )
+
+
+def _legacy_classify_cleansed_heading(stripped_upper):
+    if re.match(r"\bDAFTAR\s+ISI\b", stripped_upper):
+        return BookmarkMatch("daftar_isi", None, None, "")
+    match = re.match(r"\bBAB[\s\.]*([A-Z0-9]+)[\s:.-]*(.*)", stripped_upper, re.IGNORECASE)
+    if match:
+        return BookmarkMatch("main_chapter", "BAB", match.group(1), match.group(2))
+    return None
+
+
+def check_corpus(corpus_path=CORPUS_PATH):
+    with open(corpus_path, "r", encoding="utf-8") as f:
+        lines = [line.rstrip("\n") for line in f if not line.startswith("#")]
+
+    mismatches = []
+    for line in lines:
+        stripped = line.strip()
+        checks = [
+            ("heading", classify_heading(stripped), _legacy_classify_heading(stripped)),
+            ("toc", is_toc_line(line), _legacy_is_toc_line(line)),
+            ("babi", normalize_heading(stripped), re.sub(r"\bBABI\b", "BAB I", stripped, flags=re.IGNORECASE)),
+            ("cleansed", classify_cleansed_heading(stripped.upper()), _legacy_classify_cleansed_heading(stripped.upper())),
+        ]
+        for name, new, old in checks:
+            if new != old:
+                mismatches.append((name, line, old, new))
+
+    print(f"Checked {len(lines)} corpus lines, {len(mismatches)} mismatches.")
+    for name, line, old, new in mismatches:
+        print(f"  [{name}] {line!r}: legacy={old!r} new={new!r}")
+    return not mismatches
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_corpus(*sys.argv[1:]) else 1)
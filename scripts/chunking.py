@@ -1,8 +1,34 @@
-import json
 import time  # <-- Tambahkan ini
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+import os
+from pathlib import Path
+import jsonl_io
+from incremental import content_hash, invalidate_stages, load_manifest, manifest_path_for, mark_stage, stage_is_current
 
 # Fungsi untuk memotong teks berdasarkan jumlah token
+# Setiap chunk = (text, char_start, char_end): potongan persis dari teks halaman berdasarkan
+# offset mapping tokenizer, bukan hasil tokenizer.decode.
+def slice_chunks(text, offset_mapping):
+    chunks = []
+    for offsets in offset_mapping:
+        # Token spesial / kosong punya offset (0, 0)
+        spans = [span for span in offsets if span[1] > span[0]]
+        if not spans:
+            chunks.append(("", 0, 0))
+            continue
+        char_start, char_end = spans[0][0], spans[-1][1]
+        chunk = text[char_start:char_end]
+        char_start += len(chunk) - len(chunk.lstrip())
+        char_end -= len(chunk) - len(chunk.rstrip())
+        chunks.append((text[char_start:char_end], char_start, char_end))
+    return chunks
+
 def chunk_by_token(text, tokenizer, max_tokens=450, overlap=50):
+    if getattr(tokenizer, "is_fast", False):
+        return chunk_texts_by_token([text], tokenizer, max_tokens=max_tokens, overlap=overlap)[0]
+
+    # Tokenizer lambat (Python) tidak mendukung return_offsets_mapping: decode, tanpa offset
     inputs = tokenizer(
         text,
         return_overflowing_tokens=True,
@@ -15,48 +41,255 @@ def chunk_by_token(text, tokenizer, max_tokens=450, overlap=50):
     chunks = []
     for chunk in inputs["input_ids"]:
         decoded = tokenizer.decode(chunk, skip_special_tokens=True).strip()
-        chunks.append(decoded)
+        chunks.append((decoded, None, None))
     
     return chunks
 
+def chunk_texts_by_token(texts, tokenizer, max_tokens=450, overlap=50):
+    """
+    Versi batch chunk_by_token: banyak halaman ditokenisasi dalam satu panggilan tokenizer dan
+    setiap chunk diambil langsung dari teks asal lewat offset mapping. Return list chunk per teks,
+    urutannya sama dengan texts.
+    """
+    if not texts:
+        return []
+    # overflow_to_sample_mapping & offset mapping hanya ada di fast tokenizer (Rust)
+    if not getattr(tokenizer, "is_fast", False):
+        return [chunk_by_token(text, tokenizer, max_tokens=max_tokens, overlap=overlap) for text in texts]
+
+    texts = list(texts)
+    inputs = tokenizer(
+        texts,
+        return_overflowing_tokens=True,
+        return_offsets_mapping=True,
+        max_length=max_tokens,
+        stride=overlap,
+        truncation=True,
+        add_special_tokens=False
+    )
+
+    chunks = [[] for _ in texts]
+    for sample_idx, offsets in zip(inputs["overflow_to_sample_mapping"], inputs["offset_mapping"]):
+        chunks[sample_idx].extend(slice_chunks(texts[sample_idx], [offsets]))
+    return chunks
+
+def load_previous_chunks(output_path):
+    """Chunk hasil run sebelumnya, dikelompokkan per source_hash unit (halaman / gabungan halaman) asalnya."""
+    previous = {}
+    if not Path(output_path).exists():
+        return previous
+    for row in jsonl_io.iter_jsonl(output_path):
+        if "source_hash" in row:
+            previous.setdefault(row["source_hash"], []).append((
+                row["text"], row.get("page_start"), row.get("char_start"), row.get("page_end"), row.get("char_end")
+            ))
+    return previous
+
+
+# --- Unit chunking ---
+# Tanpa pack_pages setiap halaman jadi satu unit (perilaku lama). Dengan pack_pages, halaman berurutan
+# yang filename/bookmark/chapter_title-nya sama digabung jadi satu unit, jadi halaman pendek (pembuka
+# bab, sisa tabel) tidak lagi jadi chunk kecil sendiri-sendiri, tapi tidak pernah melewati batas section.
+def section_key(data):
+    return data.get("filename", ""), data.get("bookmark", ""), data.get("chapter_title", "")
+
+
+def iter_page_units(rows, pack_pages=False):
+    unit = []
+    unit_key = None
+    for data in rows:
+        key = section_key(data)
+        if unit and (not pack_pages or key != unit_key):
+            yield unit
+            unit = []
+        unit.append(data)
+        unit_key = key
+    if unit:
+        yield unit
+
+
+def page_hash(data):
+    return data.get("content_hash") or content_hash(data.get("content", ""))
+
+
+def unit_text(unit):
+    return "\n".join(data.get("content", "") for data in unit)
+
+
+def unit_hash(unit):
+    """Key reuse: hash content untuk unit satu halaman, hash nomor + content semua halaman untuk unit gabungan."""
+    if len(unit) == 1:
+        return page_hash(unit[0])
+    return content_hash("".join(f"{data.get('page_number', 0)}:{page_hash(data)}\n" for data in unit))
+
+
+def locate_chunks(unit, chunks):
+    """
+    Ubah offset chunk (relatif ke unit_text) jadi (text, page_start, char_start, page_end, char_end):
+    char_start relatif ke content halaman page_start, char_end relatif ke content halaman page_end.
+    """
+    page_numbers = [data.get("page_number", 0) for data in unit]
+    starts = []
+    position = 0
+    for data in unit:
+        starts.append(position)
+        position += len(data.get("content", "")) + 1  # +1 untuk "\n" penyambung
+
+    located = []
+    for text, start, end in chunks:
+        if start is None or not text:
+            located.append((text, page_numbers[0], start, page_numbers[-1], end))
+            continue
+        first = bisect_right(starts, start) - 1
+        last = bisect_right(starts, end - 1) - 1
+        located.append((text, page_numbers[first], start - starts[first], page_numbers[last], end - starts[last]))
+    return located
+
+
+def write_unit_chunks(outfile, unit, source_hash, chunks):
+    data = unit[0]
+    file_name = data.get("filename", "")
+    bookmark = data.get("bookmark", "")
+    for i, (chunk, page_start, char_start, page_end, char_end) in enumerate(chunks):
+        if len(unit) == 1:
+            # Chunk lama dari halaman yang sama bisa berasal dari nomor halaman lain
+            page_start = page_end = data.get("page_number", 0)
+        # Hanya halaman yang benar-benar tercakup chunk ini, bukan seluruh unit gabungan
+        has_tables = any(
+            page.get("has_tables", False) for page in unit if page_start <= page.get("page_number", 0) <= page_end
+        )
+        chunk_data = {
+            "chunk_id": f"{file_name}_{bookmark}_{i}",
+            "text": chunk,
+            "file_name": file_name,
+            "bookmark": bookmark,
+            "chapter_title": data.get("chapter_title", ""),
+            "page_number": page_start,
+            "page_start": page_start,
+            "page_end": page_end,
+            "has_tables": has_tables,
+            "text_length": len(chunk),
+            "char_start": char_start,  # posisi di content halaman page_start (hasil cleansing)
+            "char_end": char_end,      # posisi di content halaman page_end
+            "source_hash": source_hash
+        }
+        jsonl_io.write_row(outfile, chunk_data)
+
+
+def flush_unit_batch(outfile, batch, tokenizer, max_tokens, overlap):
+    """Tokenisasi semua unit batch yang belum punya chunk sekaligus, lalu tulis sesuai urutan input."""
+    pending = [entry for entry in batch if entry[2] is None]
+    new_chunks = chunk_texts_by_token(
+        [unit_text(unit) for unit, _, _ in pending], tokenizer, max_tokens=max_tokens, overlap=overlap
+    )
+    for entry, chunks in zip(pending, new_chunks):
+        entry[2] = locate_chunks(entry[0], chunks)
+
+    written = 0
+    for unit, source_hash, chunks in batch:
+        write_unit_chunks(outfile, unit, source_hash, chunks)
+        written += len(chunks)
+    return written
+
+
+def chunk_rows(rows, outfile, tokenizer, previous, max_tokens=450, overlap=50, batch_size=64, pack_pages=False):
+    stats = {"pages": 0, "reused": 0, "chunks": 0}
+    batch = []
+    for unit in iter_page_units(rows, pack_pages=pack_pages):
+        source_hash = unit_hash(unit)
+
+        # Pakai chunk sebelumnya kalau content unit tidak berubah, sisanya ditokenisasi per batch
+        chunks = previous.get(source_hash)
+        if chunks is not None:
+            stats["reused"] += len(unit)
+        stats["pages"] += len(unit)
+
+        batch.append([unit, source_hash, chunks])
+        if len(batch) >= batch_size:
+            stats["chunks"] += flush_unit_batch(outfile, batch, tokenizer, max_tokens, overlap)
+            batch = []
+
+    stats["chunks"] += flush_unit_batch(outfile, batch, tokenizer, max_tokens, overlap)
+    return stats
+
+
+# --- Mode sharded (multiprocess) ---
+# Tokenizer dikirim sekali ke tiap worker lewat initializer, bukan per shard.
+_worker_tokenizer = None
+
+
+def _init_chunk_worker(tokenizer):
+    global _worker_tokenizer
+    _worker_tokenizer = tokenizer
+
+
+def chunk_shard(input_path, start, end, output_path, previous_path, max_tokens, overlap, batch_size, pack_pages):
+    previous = load_previous_chunks(previous_path) if previous_path else {}
+    with open(output_path, "w", encoding="utf-8") as outfile:
+        return chunk_rows(jsonl_io.iter_jsonl_range(input_path, start, end), outfile, _worker_tokenizer, previous,
+                          max_tokens=max_tokens, overlap=overlap, batch_size=batch_size, pack_pages=pack_pages)
+
+
 # Fungsi utama untuk memproses file JSONL
-def chunk_jsonl_by_token(input_path, output_path, tokenizer, max_tokens=450, overlap=50):
-    with open(input_path, "r", encoding="utf-8") as infile, open(output_path, "w", encoding="utf-8") as outfile:
-        for line in infile:
-            data = json.loads(line)
-            content = data.get("content", "")
-            file_name = data.get("filename", "")
-            bookmark = data.get("bookmark", "")
-            chapter_title = data.get("chapter_title", "")
-            page_number = data.get("page_number", 0)
-            has_tables = data.get("has_tables", False)
-
-            # Proses chunking
-            chunks = chunk_by_token(content, tokenizer, max_tokens=max_tokens, overlap=overlap)
-
-            for i, chunk in enumerate(chunks):
-                chunk_data = {
-                    "chunk_id": f"{file_name}_{bookmark}_{i}",
-                    "text": chunk,
-                    "file_name": file_name,
-                    "bookmark": bookmark,
-                    "chapter_title": chapter_title,
-                    "page_number": page_number,
-                    "has_tables": has_tables,
-                    "text_length": len(chunk)
-                }
-                json.dump(chunk_data, outfile, ensure_ascii=False)
-                outfile.write("\n")
+def chunk_jsonl_by_token(input_path, output_path, tokenizer, max_tokens=450, overlap=50, manifest_path=None,
+                         batch_size=64, pack_pages=False, workers=1):
+    """
+    Unit (halaman, atau gabungan halaman satu section kalau pack_pages=True) ditokenisasi per
+    batch_size unit sekaligus (lihat chunk_texts_by_token); urutan output sama dengan input.
+    Dengan workers > 1 input dibagi per rentang byte (batas shard selalu di batas section kalau
+    pack_pages=True, jadi hasilnya sama dengan proses serial) dan tiap shard diproses di proses terpisah.
+    Kalau manifest_path diberikan (manifest dari ekstrak.py), dokumen yang belum berubah sejak
+    chunking terakhir di-skip, dan unit yang content-nya sama memakai chunk sebelumnya
+    (metadata tetap diambil dari baris input terbaru).
+    """
+    # "slicing" dicatat supaya chunk lama hasil decode (tanpa offset) tidak dipakai ulang
+    params = {"max_tokens": max_tokens, "overlap": overlap, "slicing": "offsets", "pack_pages": pack_pages}
+    manifest = load_manifest(manifest_path) if manifest_path else None
+    previous_params = (manifest or {}).get("stages", {}).get("chunking", {}).get("params")
+    if stage_is_current(manifest, "chunking", output_path, params=params):
+        print(f"[SKIP] Chunking {Path(input_path).name}: dokumen tidak berubah.")
+        return
+
+    reuse = manifest and previous_params == params
+    if workers <= 1:
+        previous = load_previous_chunks(output_path) if reuse else {}
+        with open(output_path, "w", encoding="utf-8") as outfile:
+            stats = chunk_rows(jsonl_io.iter_jsonl(input_path), outfile, tokenizer, previous, max_tokens=max_tokens,
+                               overlap=overlap, batch_size=batch_size, pack_pages=pack_pages)
+    else:
+        # Output lama baru ditimpa saat merge, jadi worker masih bisa membacanya untuk reuse
+        previous_path = output_path if reuse and Path(output_path).exists() else None
+        ranges = jsonl_io.split_jsonl(input_path, workers, key=section_key if pack_pages else None)
+        shard_paths = [jsonl_io.shard_path(output_path, i) for i in range(len(ranges))]
+        # Worker fork setelah tokenizer dipakai di proses utama -> matikan thread pool Rust tokenizer
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_chunk_worker, initargs=(tokenizer,)) as executor:
+            futures = [
+                executor.submit(chunk_shard, input_path, start, end, path, previous_path,
+                                max_tokens, overlap, batch_size, pack_pages)
+                for (start, end), path in zip(ranges, shard_paths)
+            ]
+            shard_stats = [future.result() for future in futures]
+        jsonl_io.concat_files(shard_paths, output_path)
+        stats = {key: sum(shard[key] for shard in shard_stats) for key in ("pages", "reused", "chunks")}
+        print(f"[INFO] Chunking: {len(ranges)} shards, {workers} workers.")
+
+    pages, reused = stats["pages"], stats["reused"]
+    print(f"[INFO] {pages} pages -> {stats['chunks']} chunks (pack_pages={pack_pages}).")
+    if manifest:
+        print(f"[INFO] Chunking: {pages - reused} pages chunked, {reused} pages reused.")
+        # Output chunking baru (misalnya params berubah) -> dedup harus jalan lagi walaupun dokumen sama
+        invalidate_stages(manifest, "dedup")
+        mark_stage(manifest_path, manifest, "chunking", params=params, chunked=pages - reused, reused=reused)
 
 # Fungsi ini dipanggil dari DAG
-def run_chunk():
-    from transformers import AutoTokenizer
-    from pathlib import Path
+def run_chunk(workers=1):
+    from model_client import get_tokenizer
 
     start_time = time.time()  
 
     print("[INFO] Loading tokenizer...")
-    tokenizer = AutoTokenizer.from_pretrained("BAAI/bge-m3")
+    tokenizer = get_tokenizer("BAAI/bge-m3")
     print("[INFO] Tokenizer loaded.")
 
     input_path = Path("/home/dwmhr/pln/data/processed/Kepdir 0306 Kepdir 2023_v7/Kepdir 0306 Kepdir 2023_ekstrak_cleansing.jsonl")
@@ -65,7 +298,10 @@ def run_chunk():
     print(f"[INFO] Input path: {input_path}")
     print(f"[INFO] Output path: {output_path}")
 
-    chunk_jsonl_by_token(str(input_path), str(output_path), tokenizer, max_tokens=450, overlap=50)
+    manifest_path = manifest_path_for(input_path)
+    chunk_jsonl_by_token(str(input_path), str(output_path), tokenizer, max_tokens=450, overlap=50,
+                         manifest_path=manifest_path if manifest_path.exists() else None, pack_pages=True,
+                         workers=workers)
 
     end_time = time.time() 
     elapsed_time = end_time - start_time
@@ -1,74 +1,209 @@
-import json
+import os
 import re
+import shutil
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from bookmark_classifier import classify_cleansed_heading
+import jsonl_io
+from incremental import content_hash, invalidate_stages, load_manifest, manifest_path_for, mark_stage, stage_is_current
 
 
 # --- Fungsi Pembersih ---
-# deteksi : baris kosong, baris yang isinya karakter aneh, baris yang kebanyakan simbol
-def is_noise_line(line):
+# Karakter yang TIDAK dihitung simbol: huruf/angka ASCII dan semua whitespace (setara [a-zA-Z0-9\s]).
+# Whitespace Unicode tertinggi adalah U+3000, jadi cukup scan sampai situ.
+_NON_SYMBOL_CHARS = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    + "".join(chr(c) for c in range(0x3001) if chr(c).isspace())
+)
+_SYMBOLS_ONLY = str.maketrans("", "", _NON_SYMBOL_CHARS)
+
+# Karakter non-ASCII yang dianggap sama dengan huruf ASCII oleh re.IGNORECASE tapi tidak oleh str.lower()
+_ADMIN_CASE_FOLD = str.maketrans({"İ": "i", "ı": "i", "ſ": "s"})
+
+
+class Cleaner:
     """
-    Deteksi apakah baris termasuk 'noise':
-    - Baris kosong
-    - Rasio karakter non-alfanumerik tinggi (dengan pengecualian pola daftar isi seperti titik-titik)
+    Engine pembersih teks: semua pola di-compile sekali, rasio simbol dihitung tanpa membuat list
+    match (str.translate), dan filter noise + header/administrasi dicek dalam satu pass per baris.
+    Substitusi (underscore, garis panjang, spasi ganda) tidak pernah melewati batas baris, jadi
+    dijalankan sekali untuk seluruh halaman, bukan per baris.
     """
-    if not line.strip():
-        return True
 
-    # Jangan anggap baris dengan pola daftar isi (.......) sebagai noise
-    if re.search(r"\.{5,}", line):  # Banyak titik-titik = kemungkinan besar daftar isi
-        return False
+    # Setara r"Edisi ke\s*:|Revisi ke\s*:|Tanggal Berlaku|Paraf" dengan IGNORECASE, dicocokkan ke baris
+    # yang sudah di-lowercase (jauh lebih cepat daripada regex IGNORECASE)
+    ADMIN_LINE_RE = re.compile(r"edisi ke\s*:|revisi ke\s*:|tanggal berlaku|paraf")
+    INNER_UNDERSCORE_RE = re.compile(r"(?<=[a-zA-Z])_(?=[a-zA-Z])")
+    LONG_RULE_RE = re.compile(r"[_\-]{3,}")
+    MULTI_SPACE_RE = re.compile(r" {2,}")
+    BLANK_LINES_RE = re.compile(r"\n{2,}")
+
+    def __init__(self, noise_ratio=0.5):
+        self.noise_ratio = noise_ratio
+
+    def is_noise(self, line):
+        """
+        Deteksi apakah baris termasuk 'noise':
+        - Baris kosong
+        - Rasio karakter non-alfanumerik tinggi (dengan pengecualian pola daftar isi seperti titik-titik)
+        """
+        if not line.strip():
+            return True
+
+        # Jangan anggap baris dengan pola daftar isi (.......) sebagai noise
+        if "....." in line:
+            return False
+
+        non_alpha = len(line.translate(_SYMBOLS_ONLY))
+        return non_alpha / max(1, len(line)) > self.noise_ratio
+
+    def is_admin_line(self, line):
+        # Baris header & penanda administrasi (tapi JANGAN buang DAFTAR ISI)
+        return self.ADMIN_LINE_RE.search(line.translate(_ADMIN_CASE_FOLD).lower()) is not None
+
+    def keep_line(self, line):
+        return not self.is_noise(line) and not self.is_admin_line(line)
+
+    def clean(self, text, boilerplate=None):
+        """boilerplate: set key baris header/footer dokumen (lihat find_boilerplate_lines) yang ikut dibuang."""
+        lines = map(str.strip, text.splitlines())
+        if boilerplate:
+            lines = (line for line in lines if boilerplate_key(line) not in boilerplate)
+        cleaned_text = "\n".join(line for line in lines if self.keep_line(line))
+
+        # Hapus underscore antar huruf, garis panjang, dan spasi/tab ganda
+        # (cek substring dulu supaya regex hanya jalan kalau memang bisa match)
+        if "_" in cleaned_text:
+            cleaned_text = self.INNER_UNDERSCORE_RE.sub("", cleaned_text)
+        if "_" in cleaned_text or "---" in cleaned_text:
+            cleaned_text = self.LONG_RULE_RE.sub("", cleaned_text)
+        cleaned_text = self.MULTI_SPACE_RE.sub(" ", cleaned_text.replace("\t", " "))
+
+        if "\n\n" in cleaned_text:
+            cleaned_text = self.BLANK_LINES_RE.sub("\n", cleaned_text)
+        return cleaned_text.strip()
+
 
-    non_alpha = len(re.findall(r"[^a-zA-Z0-9\s]", line))
-    ratio = non_alpha / max(1, len(line))
-    return ratio > 0.5
+DEFAULT_CLEANER = Cleaner()
+
+
+# deteksi : baris kosong, baris yang isinya karakter aneh, baris yang kebanyakan simbol
+def is_noise_line(line):
+    return DEFAULT_CLEANER.is_noise(line)
 
 
 def clean_text(text):
-    lines = text.splitlines()
-    clean_lines = []
+    return DEFAULT_CLEANER.clean(text)
 
-    for line in lines:
-        line = line.strip()
 
-        # Deteksi baris noise
-        if is_noise_line(line):
-            continue
+# --- Deteksi header/footer berulang (boilerplate) per dokumen ---
+# Baris yang muncul di lebih dari BOILERPLATE_RATIO halaman dokumen (judul dokumen, nama unit,
+# "Halaman 3 dari 40", dst) dianggap boilerplate. Angka dinormalisasi supaya nomor halaman ikut cocok.
+BOILERPLATE_RATIO = 0.6
+BOILERPLATE_MIN_PAGES = 5
+BOILERPLATE_MIN_LETTERS = 3  # baris pendek seperti "1." atau "a." jangan pernah dianggap boilerplate
+
+# Naikkan kalau aturan Cleaner, deteksi boilerplate atau deteksi bookmark/chapter berubah, supaya
+# dokumen yang sudah pernah di-cleansing diproses ulang (hasil lama tidak di-skip/dipakai ulang)
+CLEANSING_VERSION = 1
+DIGITS_RE = re.compile(r"\d+")
+
+
+def boilerplate_key(stripped_line):
+    return DIGITS_RE.sub("#", stripped_line)
+
 
-        # Buang baris header & penanda administrasi (tapi JANGAN buang DAFTAR ISI)
-        if re.search(r"Edisi ke\s*:|Revisi ke\s*:|Tanggal Berlaku|Paraf", line, re.IGNORECASE):
+def count_page_lines(input_path, start=0, end=None):
+    """Hitung kemunculan baris (key boilerplate) pada rentang byte JSONL ekstrak. Dipakai per shard."""
+    page_counts = Counter()
+    occurrences = Counter()
+    samples = {}
+    pages = 0
+
+    for data in jsonl_io.iter_jsonl_range(input_path, start, end):
+        pages += 1
+        keys = []
+        for raw in data["content"].splitlines():
+            stripped = raw.strip()
+            if stripped:
+                key = boilerplate_key(stripped)
+                samples.setdefault(key, stripped)
+                keys.append(key)
+        occurrences.update(keys)
+        page_counts.update(set(keys))
+    return pages, page_counts, occurrences, samples
+
+
+def find_boilerplate_lines(input_path, ratio=BOILERPLATE_RATIO, min_pages=BOILERPLATE_MIN_PAGES, cleaner=None,
+                           executor=None, n_shards=1):
+    """
+    Pre-pass streaming atas JSONL ekstrak: hitung di berapa halaman tiap baris muncul.
+    Return (set key boilerplate, stats) dengan stats = perkiraan bytes/token yang dibuang.
+    Baris yang memang sudah dibuang clean_text (noise, header administrasi) dan baris heading BAB tidak ikut.
+    Dengan executor, penghitungan dibagi ke n_shards rentang byte dan hasilnya digabung.
+    """
+    cleaner = cleaner or DEFAULT_CLEANER
+    if executor is None:
+        pages, page_counts, occurrences, samples = count_page_lines(input_path)
+    else:
+        pages, page_counts, occurrences, samples = 0, Counter(), Counter(), {}
+        ranges = jsonl_io.split_jsonl(input_path, n_shards)
+        futures = [executor.submit(count_page_lines, input_path, start, end) for start, end in ranges]
+        for future in futures:
+            shard_pages, shard_page_counts, shard_occurrences, shard_samples = future.result()
+            pages += shard_pages
+            page_counts.update(shard_page_counts)
+            occurrences.update(shard_occurrences)
+            for key, sample in shard_samples.items():
+                samples.setdefault(key, sample)
+
+    boilerplate = set()
+    stats = {"lines": 0, "bytes": 0, "tokens": 0}
+    if pages < min_pages:
+        return boilerplate, stats
+
+    for key, count in page_counts.items():
+        if count / pages <= ratio or sum(c.isalpha() for c in key) < BOILERPLATE_MIN_LETTERS:
+            continue
+        sample = samples[key]
+        # Heading (BAB ...) tetap dipertahankan karena dipakai untuk deteksi bookmark
+        if not cleaner.keep_line(sample) or classify_cleansed_heading(sample.upper()) is not None:
             continue
+        boilerplate.add(key)
+        stats["lines"] += occurrences[key]
+        stats["bytes"] += occurrences[key] * len(sample.encode("utf-8"))
+        stats["tokens"] += occurrences[key] * len(sample.split())  # perkiraan: 1 kata ~ 1 token
+    return boilerplate, stats
 
-        # Hapus underscore antar huruf, garis panjang, dan spasi/tab ganda
-        line = re.sub(r"(?<=[a-zA-Z])_(?=[a-zA-Z])", "", line)
-        line = re.sub(r"[_\-]{3,}", "", line)
-        line = re.sub(r"[ \t]+", " ", line)
 
-        clean_lines.append(line)
+def cleaner_params(cleaner):
+    """Bagian params stage cleansing yang menentukan hasil bersih per halaman."""
+    return {"version": CLEANSING_VERSION, "cleaner": type(cleaner).__name__, "noise_ratio": cleaner.noise_ratio}
+
 
-    cleaned_text = "\n".join(clean_lines)
-    cleaned_text = re.sub(r"\n{2,}", "\n", cleaned_text)
-    return cleaned_text.strip()
+def boilerplate_signature(boilerplate):
+    return content_hash("\n".join(sorted(boilerplate)))
 
 
 def extract_bookmark_and_title(lines):
 
     for i, line in enumerate(lines):
-        stripped = line.strip().upper()
+        heading = classify_cleansed_heading(line.strip().upper())
+        if heading is None:
+            continue
 
         # Jika terdeteksi DAFTAR ISI
-        if re.match(r"\bDAFTAR\s+ISI\b", stripped):
+        if heading.kind == "daftar_isi":
             return "DAFTAR ISI", ""
 
         # Jika pola BAB I + Judul
-        match = re.match(r"\bBAB[\s\.]*([A-Z0-9]+)[\s:.-]*(.*)", stripped, re.IGNORECASE)
-        if match:
-            bab = f"BAB {match.group(1)}"
-            title = match.group(2).title().strip()
-            if not title and i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-                if not is_noise_line(next_line):
-                    title = next_line.title()
-            return bab, title
+        bab = f"BAB {heading.number}"
+        title = heading.title.title().strip()
+        if not title and i + 1 < len(lines):
+            next_line = lines[i + 1].strip()
+            if not is_noise_line(next_line):
+                title = next_line.title()
+        return bab, title
 
     return None, None
 
@@ -78,42 +213,169 @@ def extract_bookmark_and_title(lines):
 # ambil isi teks content
 # bersihin pakek clean_text
 # tambahin content_length
-def clean_jsonl(input_path, output_path):
-    last_bookmark = ""
-    last_chapter_title = ""
-
-    with open(input_path, "r", encoding="utf-8") as infile, open(output_path, "w", encoding="utf-8") as outfile:
-        for line in infile:
-            data = json.loads(line)
-            cleaned = clean_text(data["content"])
-            data["content"] = cleaned
-            data["content_length"] = len(cleaned)
-
-            # Deteksi bookmark & chapter
-            lines = cleaned.splitlines()
-            bookmark, chapter_title = extract_bookmark_and_title(lines)
-
-            # Kalau tidak ditemukan, pakai yang sebelumnya
-            if not bookmark:
-                bookmark = last_bookmark
-            else:
-                last_bookmark = bookmark
-
-            if not chapter_title:
-                chapter_title = last_chapter_title
-            else:
-                last_chapter_title = chapter_title
-
-            data["bookmark"] = bookmark
-            data["chapter_title"] = chapter_title
-
-            json.dump(data, outfile, ensure_ascii=False)
-            outfile.write("\n")
+def load_previous_cleaned(output_path):
+    """Hasil cleansing run sebelumnya: source_hash -> content yang sudah bersih."""
+    if not Path(output_path).exists():
+        return {}
+    return {row["source_hash"]: row["content"] for row in jsonl_io.iter_jsonl(output_path) if "source_hash" in row}
+
+
+def clean_rows(rows, outfile, cleaner, boilerplate, previous):
+    """
+    Bersihkan & tulis rows. Halaman tanpa bookmark/chapter_title sendiri mewarisi nilai halaman sebelumnya.
+    Selain jumlah halaman, return state carry-forward untuk penggabungan shard: jumlah baris awal yang
+    belum punya bookmark/chapter_title sendiri dan nilai terakhir yang terdeteksi (None kalau tidak ada).
+    """
+    last_bookmark = None
+    last_chapter_title = None
+    stats = {"pages": 0, "reused": 0, "leading_bookmark": 0, "leading_chapter_title": 0}
+
+    for data in rows:
+        source_hash = data.get("content_hash") or content_hash(data["content"])
+        cleaned = previous.get(source_hash)
+        if cleaned is None:
+            cleaned = cleaner.clean(data["content"], boilerplate)
+        else:
+            stats["reused"] += 1
+        stats["pages"] += 1
+
+        data["content"] = cleaned
+        data["content_length"] = len(cleaned)
+        data["source_hash"] = source_hash
+        data["content_hash"] = content_hash(cleaned)
+
+        # Deteksi bookmark & chapter
+        lines = cleaned.splitlines()
+        bookmark, chapter_title = extract_bookmark_and_title(lines)
+
+        # Kalau tidak ditemukan, pakai yang sebelumnya
+        if bookmark:
+            last_bookmark = bookmark
+        elif last_bookmark is None:
+            stats["leading_bookmark"] += 1
+
+        if chapter_title:
+            last_chapter_title = chapter_title
+        elif last_chapter_title is None:
+            stats["leading_chapter_title"] += 1
+
+        data["bookmark"] = last_bookmark or ""
+        data["chapter_title"] = last_chapter_title or ""
+
+        jsonl_io.write_row(outfile, data)
+
+    stats["last_bookmark"] = last_bookmark
+    stats["last_chapter_title"] = last_chapter_title
+    return stats
+
+
+def clean_shard(input_path, start, end, output_path, cleaner, boilerplate, previous_path):
+    previous = load_previous_cleaned(previous_path) if previous_path else {}
+    with open(output_path, "w", encoding="utf-8") as outfile:
+        return clean_rows(jsonl_io.iter_jsonl_range(input_path, start, end), outfile, cleaner, boilerplate, previous)
+
+
+def merge_cleaned_shards(shard_paths, shard_stats, output_path):
+    """
+    Gabungkan shard sesuai urutan. Baris awal shard yang belum punya bookmark/chapter_title sendiri
+    diisi dari shard sebelumnya (sama dengan carry-forward pada proses serial); sisanya disalin apa adanya.
+    """
+    bookmark, chapter_title = "", ""
+    with open(output_path, "wb") as outfile:
+        for path, stats in zip(shard_paths, shard_stats):
+            with open(path, "rb") as infile:
+                leading = max(stats["leading_bookmark"], stats["leading_chapter_title"])
+                if bookmark or chapter_title:
+                    for i, line in zip(range(leading), infile):
+                        data = jsonl_io.loads(line)
+                        if i < stats["leading_bookmark"]:
+                            data["bookmark"] = bookmark
+                        if i < stats["leading_chapter_title"]:
+                            data["chapter_title"] = chapter_title
+                        outfile.write((jsonl_io.dumps(data) + "\n").encode("utf-8"))
+                shutil.copyfileobj(infile, outfile)
+            os.remove(path)
+
+            bookmark = stats["last_bookmark"] or bookmark
+            chapter_title = stats["last_chapter_title"] or chapter_title
+
+
+def clean_jsonl(input_path, output_path, manifest_path=None, cleaner=None, boilerplate_ratio=BOILERPLATE_RATIO,
+                workers=1):
+    """
+    Kalau manifest_path diberikan (manifest dari ekstrak.py), dokumen yang belum berubah sejak
+    cleansing terakhir di-skip, dan halaman yang content-nya sama memakai hasil bersih sebelumnya.
+    Header/footer yang berulang di lebih dari boilerplate_ratio halaman dibuang (None = nonaktif).
+    Dengan workers > 1 input dibagi per rentang byte dan tiap shard diproses di proses terpisah.
+    """
+    cleaner = cleaner or DEFAULT_CLEANER
+    manifest = load_manifest(manifest_path) if manifest_path else None
+    previous_stage = (manifest or {}).get("stages", {}).get("cleansing", {})
+    params = {
+        **cleaner_params(cleaner),
+        "boilerplate_ratio": boilerplate_ratio,
+        "boilerplate_min_pages": BOILERPLATE_MIN_PAGES,
+        "boilerplate_min_letters": BOILERPLATE_MIN_LETTERS,
+    }
+    if stage_is_current(manifest, "cleansing", output_path, params=params):
+        print(f"[SKIP] Cleansing {Path(input_path).name}: dokumen tidak berubah.")
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if boilerplate_ratio:
+            boilerplate, saved = find_boilerplate_lines(input_path, ratio=boilerplate_ratio, cleaner=cleaner,
+                                                        executor=executor, n_shards=workers)
+        else:
+            boilerplate, saved = set(), {"lines": 0, "bytes": 0, "tokens": 0}
+        signature = boilerplate_signature(boilerplate)
+
+        # Hasil bersih lama hanya bisa dipakai ulang kalau set boilerplate dan aturan Cleaner-nya sama
+        previous_params = previous_stage.get("params", {})
+        same_cleaner = all(previous_params.get(key) == value for key, value in cleaner_params(cleaner).items())
+        reuse = bool(manifest) and same_cleaner and previous_stage.get("boilerplate") == signature
+
+        if executor is None:
+            previous = load_previous_cleaned(output_path) if reuse else {}
+            with open(output_path, "w", encoding="utf-8") as outfile:
+                stats = clean_rows(jsonl_io.iter_jsonl(input_path), outfile, cleaner, boilerplate, previous)
+            pages, reused = stats["pages"], stats["reused"]
+        else:
+            # Output lama baru ditimpa saat merge, jadi worker masih bisa membacanya untuk reuse
+            previous_path = output_path if reuse and Path(output_path).exists() else None
+            ranges = jsonl_io.split_jsonl(input_path, workers)
+            shard_paths = [jsonl_io.shard_path(output_path, i) for i in range(len(ranges))]
+            futures = [
+                executor.submit(clean_shard, input_path, start, end, path, cleaner, boilerplate, previous_path)
+                for (start, end), path in zip(ranges, shard_paths)
+            ]
+            shard_stats = [future.result() for future in futures]
+            merge_cleaned_shards(shard_paths, shard_stats, output_path)
+            pages = sum(stats["pages"] for stats in shard_stats)
+            reused = sum(stats["reused"] for stats in shard_stats)
+            print(f"[INFO] Cleansing: {len(ranges)} shards, {workers} workers.")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    print(
+        f"[INFO] Boilerplate: {len(boilerplate)} baris header/footer, {saved['lines']} baris dibuang, "
+        f"{saved['bytes']:,} bytes / ~{saved['tokens']:,} token dihemat."
+    )
+    if manifest:
+        print(f"[INFO] Cleansing: {pages - reused} pages cleaned, {reused} pages reused.")
+        if not reuse:
+            # Output cleansing berubah walau dokumennya sama -> chunking harus jalan lagi
+            invalidate_stages(manifest, "chunking")
+        mark_stage(
+            manifest_path, manifest, "cleansing", params=params, cleaned=pages - reused, reused=reused,
+            boilerplate=signature, boilerplate_saved=saved,
+        )
 
 # --- Eksekusi ---
 BASE_DIR = Path(__file__).resolve().parent.parent  # /home/dwmhr/pln-etl
 
-def run_cleansing(input_path=None, **kwargs):
+def run_cleansing(input_path=None, workers=1, **kwargs):
     if input_path is None:
         input_path = BASE_DIR / "data/processed/Kepdir 0306 Kepdir 2023/Kepdir 0306 Kepdir 2023_ekstrak.jsonl"
 
@@ -122,7 +384,9 @@ def run_cleansing(input_path=None, **kwargs):
     output_dir.mkdir(parents=True, exist_ok=True)
 
     output_file = output_dir / f"{input_file.stem}_cleansing.jsonl"
-    clean_jsonl(str(input_path), str(output_file))
+    manifest_path = manifest_path_for(input_file)
+    clean_jsonl(str(input_path), str(output_file), manifest_path=manifest_path if manifest_path.exists() else None,
+                workers=workers)
 
 
 if __name__ == "__main__":
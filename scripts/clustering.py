@@ -1,11 +1,12 @@
 from pymilvus import Collection, connections
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
+from model_client import get_encoder
 
 # Step 1: Koneksi ke Milvus
 connections.connect("default", host="localhost", port="19530")
 
 # Step 2: Load model embedding
-model = SentenceTransformer("intfloat/multilingual-e5-large", device='cpu')
+model = get_encoder("intfloat/multilingual-e5-large")
 
 # Step 3: Load collection dari Milvus
 collection = Collection("pln_embeddings_simplified")
@@ -31,7 +32,6 @@ def search_and_group_chunks(query, top_k=20, similarity_threshold=0.75):
     # Ambil hasil dan simpan ke dalam list
     results = search_result[0]
     chunks = []
-    embeddings = []
 
     for hit in results:
         chunks.append({
@@ -41,8 +41,9 @@ def search_and_group_chunks(query, top_k=20, similarity_threshold=0.75):
             "chapter_title": hit.entity.get("chapter_title", "N/A"),
             "score": hit.distance
         })
-        # Re-encode karena kita perlu embedding teks untuk clustering
-        embeddings.append(model.encode(hit.entity.get("text", "")))
+
+    # Re-encode karena kita perlu embedding teks untuk clustering (satu panggilan untuk semua hasil)
+    embeddings = model.encode([chunk["text"] for chunk in chunks], normalize_embeddings=True)
 
     # Kelompokkan berdasarkan similarity
     groups = []
@@ -55,7 +56,7 @@ def search_and_group_chunks(query, top_k=20, similarity_threshold=0.75):
         visited[i] = True
         for j in range(i + 1, len(chunks)):
             if not visited[j]:
-                sim = util.cos_sim(embeddings[i], embeddings[j]).item()
+                sim = float(np.dot(embeddings[i], embeddings[j]))
                 if sim >= similarity_threshold:
                     group.append(chunks[j])
                     visited[j] = True
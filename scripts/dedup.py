@@ -0,0 +1,207 @@
+import hashlib
+import re
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+import jsonl_io
+from embedding_cache import normalize_text
+from incremental import content_hash, load_manifest, manifest_path_for, mark_stage, stage_is_current
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# --- Dedup chunk sebelum embedding ---
+# Definisi, boilerplate hukum dan header tabel yang berulang menghasilkan chunk yang (hampir) sama.
+# Tahap 1: hash teks ternormalisasi -> duplikat persis.
+# Tahap 2: MinHash (shingle SHINGLE_SIZE kata) + LSH -> kandidat near-duplicate, diterima kalau
+#          estimasi Jaccard >= DEDUP_THRESHOLD.
+# Semua dokumen di-dedup bersama (dedup_corpus), jadi duplikat antar bab maupun antar dokumen terbuang.
+# Chunk pertama (urutan file lalu urutan dokumen) jadi kanonik; file/halaman duplikatnya dicatat di
+# field "duplicates".
+DEDUP_THRESHOLD = 0.85
+NUM_PERM = 128
+# 16 band x 8 row: peluang jadi kandidat ~99% untuk Jaccard 0.85, ~6% untuk Jaccard 0.5
+LSH_BANDS = 16
+SHINGLE_SIZE = 5
+
+WORD_RE = re.compile(r"\w+")
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, np.iinfo(np.int64).max, NUM_PERM, dtype=np.int64).astype(np.uint64)
+_PERM_B = _rng.randint(0, np.iinfo(np.int64).max, NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+
+def exact_key(text):
+    return hashlib.sha1(normalize_text(text).lower().encode("utf-8")).hexdigest()
+
+
+def shingle_hashes(text):
+    words = WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        # Chunk sangat pendek hanya di-dedup secara persis
+        return None
+    grams = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(hashes):
+    # Permutasi universal (a*x + b) mod p, overflow uint64 disengaja (sama seperti datasketch)
+    with np.errstate(over="ignore"):
+        permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0)
+
+
+def lsh_keys(signature):
+    rows = NUM_PERM // LSH_BANDS
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(LSH_BANDS)]
+
+
+def provenance(row, similarity):
+    return {
+        "chunk_id": row.get("chunk_id", ""),
+        "file_name": row.get("file_name", ""),
+        "page_start": row.get("page_start", row.get("page_number", 0)),
+        "page_end": row.get("page_end", row.get("page_number", 0)),
+        "similarity": round(float(similarity), 3),
+    }
+
+
+def find_duplicates(rows, threshold=DEDUP_THRESHOLD):
+    """
+    Return (duplicate_of {index: index kanonik}, duplicates {index kanonik: [provenance]}, stats).
+    Hanya signature chunk kanonik yang disimpan; chunk dibandingkan dengan kanonik sebelumnya.
+    """
+    exact_seen = {}
+    signatures = {}
+    buckets = {}
+    duplicate_of = {}
+    duplicates = {}
+    stats = {"chunks": 0, "exact": 0, "near": 0}
+
+    for index, row in enumerate(rows):
+        stats["chunks"] += 1
+        text = row.get("text", "")
+        key = exact_key(text)
+        if key in exact_seen:
+            canonical = exact_seen[key]
+            duplicate_of[index] = canonical
+            duplicates.setdefault(canonical, []).append(provenance(row, 1.0))
+            stats["exact"] += 1
+            continue
+
+        hashes = shingle_hashes(text)
+        signature = minhash(hashes) if hashes is not None else None
+        keys = lsh_keys(signature) if signature is not None else []
+
+        best, best_similarity = None, threshold
+        candidates = {candidate for band_key in keys for candidate in buckets.get(band_key, ())}
+        for candidate in sorted(candidates):
+            similarity = float(np.mean(signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+
+        if best is not None:
+            duplicate_of[index] = best
+            duplicates.setdefault(best, []).append(provenance(row, best_similarity))
+            exact_seen[key] = best
+            stats["near"] += 1
+            continue
+
+        exact_seen[key] = index
+        if signature is not None:
+            signatures[index] = signature
+            for band_key in keys:
+                buckets.setdefault(band_key, []).append(index)
+
+    stats["kept"] = stats["chunks"] - stats["exact"] - stats["near"]
+    return duplicate_of, duplicates, stats
+
+
+def iter_corpus_rows(input_paths):
+    for input_path in input_paths:
+        yield from jsonl_io.iter_jsonl(input_path)
+
+
+def dedup_corpus(input_paths, output_paths, manifest_paths=None, threshold=DEDUP_THRESHOLD):
+    """
+    Dedup beberapa file chunk sekaligus (satu index exact-hash + LSH untuk semua dokumen), jadi
+    boilerplate yang sama di dokumen lain juga terbuang. Kanonik = kemunculan pertama sesuai urutan
+    input_paths; tiap file output hanya berisi chunk kanonik miliknya sendiri, dengan provenance
+    duplikat (termasuk dari dokumen lain) di field "duplicates".
+    Dua pass streaming: pass 1 mencari duplikat, pass 2 menulis output sesuai urutan input.
+    """
+    manifest_paths = manifest_paths or [None] * len(input_paths)
+    # Kanonik bergantung pada seluruh korpus: daftar file ikut jadi bagian params
+    corpus = content_hash("\n".join(str(Path(path).resolve()) for path in input_paths))
+    params = {"threshold": threshold, "num_perm": NUM_PERM, "bands": LSH_BANDS, "shingle": SHINGLE_SIZE,
+              "corpus": corpus}
+    manifests = [load_manifest(path) if path else None for path in manifest_paths]
+    if input_paths and all(
+        stage_is_current(manifest, "dedup", output_path, params=params)
+        for manifest, output_path in zip(manifests, output_paths)
+    ):
+        print(f"[SKIP] Dedup {len(input_paths)} file: chunk tidak berubah.")
+        return
+
+    duplicate_of, duplicates, stats = find_duplicates(iter_corpus_rows(input_paths), threshold=threshold)
+
+    index = 0
+    for input_path, output_path, manifest_path, manifest in zip(input_paths, output_paths, manifest_paths, manifests):
+        file_stats = {"chunks": 0, "kept": 0}
+        with open(output_path, "w", encoding="utf-8") as outfile:
+            for row in jsonl_io.iter_jsonl(input_path):
+                file_stats["chunks"] += 1
+                if index not in duplicate_of:
+                    if index in duplicates:
+                        row["duplicates"] = duplicates[index]
+                    jsonl_io.write_row(outfile, row)
+                    file_stats["kept"] += 1
+                index += 1
+        if manifest:
+            mark_stage(manifest_path, manifest, "dedup", params=params, **file_stats)
+
+    removed = stats["exact"] + stats["near"]
+    print(f"[INFO] Dedup {len(input_paths)} file: {stats['chunks']} chunks -> {stats['kept']} kept "
+          f"({stats['exact']} exact + {stats['near']} near-duplicates removed, "
+          f"{removed / max(1, stats['chunks']):.1%}).")
+    return stats
+
+
+def dedup_jsonl(input_path, output_path, manifest_path=None, threshold=DEDUP_THRESHOLD):
+    """Dedup satu file chunk saja (tanpa dokumen lain)."""
+    return dedup_corpus([input_path], [output_path], [manifest_path], threshold=threshold)
+
+
+def dedup_output_path(input_path):
+    input_path = Path(input_path)
+    return input_path.with_name(f"{input_path.stem}_dedup.jsonl")
+
+
+def find_chunk_files(input_dir):
+    return sorted(Path(input_dir).rglob("*_ekstrak_chunked.jsonl"))
+
+
+# Fungsi ini dipanggil dari DAG
+def run_dedup(input_paths=None, input_dir=None, threshold=DEDUP_THRESHOLD):
+    """
+    Default: semua output chunking (*_ekstrak_chunked.jsonl) di data/processed di-dedup bersama,
+    sebelum embedding. Output per dokumen: <dokumen>_ekstrak_chunked_dedup.jsonl.
+    """
+    start_time = time.time()
+    if input_paths is None:
+        input_paths = find_chunk_files(input_dir or BASE_DIR / "data/processed")
+    input_paths = [Path(path) for path in input_paths]
+    print(f"[INFO] Dedup {len(input_paths)} chunk files")
+
+    manifest_paths = [manifest_path_for(path) for path in input_paths]
+    dedup_corpus([str(path) for path in input_paths], [str(dedup_output_path(path)) for path in input_paths],
+                 [str(path) if path.exists() else None for path in manifest_paths], threshold=threshold)
+    print(f"[DONE] Dedup complete in {time.time() - start_time:.2f} seconds.")
+
+
+if __name__ == "__main__":
+    run_dedup()
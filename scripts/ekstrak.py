@@ -1,189 +1,634 @@
-import pdfplumber
 import re
 import json
 from pathlib import Path
 import logging
+import gzip
+import os
+import time
+from datetime import datetime
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pdf_backend import open_backend
+from bookmark_classifier import classify_heading, is_toc_line, normalize_heading
+import jsonl_io
+from incremental import content_hash, file_sha256, invalidate_stages, load_manifest, pages_fingerprint, save_manifest
+
+# Caption tabel: yang case-insensitive untuk memicu format tabel, yang biasa untuk flag has_tables
+TABLE_CAPTION_RE = re.compile(r"[Tt]abel\s*(\d+)", re.IGNORECASE)
+HAS_TABLE_RE = re.compile(r"[Tt]abel\s*\d+")
+
+# Jumlah halaman per task yang dikirim ke worker pada mode paralel
+PAGES_PER_TASK = 16
+
+# Minimal jumlah garis/kotak supaya halaman tanpa caption tetap dicek tabelnya.
+# Tabel dengan >1 baris butuh minimal 2 objek ruling, di bawah itu extract_tables() pasti kosong.
+MIN_TABLE_RULINGS = 2
+
+_EMPTY = frozenset()
+
+# Naikkan setiap kali logika ekstraksi berubah supaya manifest lama tidak dipakai untuk skip dokumen
+EXTRACTOR_VERSION = 1
+
+# Naikkan setiap kali tahap parsing (read_page / pre-check tabel / backend) berubah
+# supaya cache halaman lama tidak dipakai lagi
+PARSER_VERSION = 1
+
+
+# --- Tahap 1: parsing PDF (mahal, bisa paralel) ---
+def looks_tabular(pdf, page_num, text):
+    """Pre-check murah sebelum extract_tables(): ada caption "Tabel N" atau ada garis/kotak di halaman."""
+    if HAS_TABLE_RE.search(text):
+        return True
+    return pdf.count_rulings(page_num) >= MIN_TABLE_RULINGS
+
+
+def read_page(pdf, page_num):
+    """
+    Ambil teks & tabel mentah satu halaman dari backend yang sudah dibuka.
+    tables bernilai None kalau extract_tables() dilewati oleh pre-check.
+    """
+    text = pdf.extract_text(page_num)
+    if text and looks_tabular(pdf, page_num, text):
+        tables = pdf.extract_tables(page_num)
+    else:
+        tables = None
+    # Buang cache objek halaman supaya memori tidak tumbuh sepanjang dokumen
+    pdf.release(page_num)
+    return text, tables
+
+
+def read_page_range(file_path, start, end, backend="pdfplumber"):
+    """
+    Ambil teks & tabel mentah untuk halaman [start, end) (1-based).
+    Setiap pemanggilan membuka handle PDF sendiri, jadi aman dijalankan di proses worker.
+    """
+    pages = []
+    with open_backend(backend, file_path) as pdf:
+        for page_num in range(start, end):
+            pages.append((page_num, *read_page(pdf, page_num)))
+    return pages
+
+
+def iter_raw_pages(file_path, workers=1, pages_per_task=PAGES_PER_TASK, backend="pdfplumber", start_page=1):
+    """Yield (page_num, text, tables) berurutan sesuai nomor halaman, mulai dari start_page."""
+    if workers <= 1:
+        with open_backend(backend, file_path) as pdf:
+            for page_num in range(start_page, len(pdf) + 1):
+                print(f"Processing page {page_num}...")
+                yield (page_num, *read_page(pdf, page_num))
+        return
+
+    with open_backend(backend, file_path) as pdf:
+        total_pages = len(pdf)
+
+    ranges = ((start, min(start + pages_per_task, total_pages + 1))
+              for start in range(start_page, total_pages + 1, pages_per_task))
+
+    print(f"Processing {total_pages} pages with {workers} workers...")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Hanya sejumlah kecil range yang "in flight" supaya hasil yang menunggu
+        # giliran tidak menumpuk di memori; urutan hasil tetap sesuai nomor halaman
+        pending = deque()
+        for start, end in islice(ranges, workers * 2):
+            pending.append((start, end, executor.submit(read_page_range, file_path, start, end, backend)))
+
+        while pending:
+            start, end, future = pending.popleft()
+            next_range = next(ranges, None)
+            if next_range:
+                pending.append((*next_range, executor.submit(read_page_range, file_path, *next_range, backend)))
+            print(f"Processing pages {start}-{end - 1}...")
+            yield from future.result()
+
+
+# --- Cache hasil parsing ---
+# Teks mentah & cell tabel per halaman disimpan sebagai JSONL gzip, key = hash file + backend + PARSER_VERSION.
+# Dengan cache, perubahan heuristik bookmark/TOC/format tabel cukup menjalankan ulang tahap 2 tanpa parsing PDF.
+def page_cache_path(cache_dir, file_hash, backend):
+    return Path(cache_dir) / f"{file_hash}_{backend}_v{PARSER_VERSION}.jsonl.gz"
+
+
+# File .tmp cache yang ditinggal proses mati (crash/kill) dibuang saat cache dibuka.
+# .tmp milik proses yang masih hidup atau yang baru saja ditulis tidak disentuh.
+CACHE_TMP_MAX_AGE = 24 * 3600
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def sweep_cache_tmp(cache_dir, max_age=CACHE_TMP_MAX_AGE):
+    cache_dir = Path(cache_dir)
+    if not cache_dir.exists():
+        return 0
+    removed = 0
+    now = time.time()
+    for tmp_path in cache_dir.glob("*.tmp"):
+        pid = tmp_path.suffixes[-2].lstrip(".") if len(tmp_path.suffixes) >= 2 else ""
+        try:
+            stale = now - tmp_path.stat().st_mtime > max_age or (pid.isdigit() and not pid_alive(int(pid)))
+            if stale:
+                tmp_path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            # Sudah di-rename/dihapus proses lain
+            continue
+    if removed:
+        print(f"[CACHE] Removed {removed} stale temporary cache files from {cache_dir}")
+    return removed
+
+
+def iter_cached_pages(file_path, cache_path, workers=1, backend="pdfplumber", start_page=1):
+    """Seperti iter_raw_pages, tapi baca dari cache kalau ada dan isi cache kalau belum ada."""
+    if cache_path.exists():
+        print(f"[CACHE] Using parsed pages from {cache_path.name}")
+        with gzip.open(cache_path, "rt", encoding="utf-8") as f:
+            for row in map(jsonl_io.loads, f):
+                if row["page"] >= start_page:
+                    yield row["page"], row["text"], row["tables"]
+        return
+
+    # Cache hanya ditulis kalau dokumen diparsing dari halaman pertama
+    if start_page > 1:
+        yield from iter_raw_pages(file_path, workers=workers, backend=backend, start_page=start_page)
+        return
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            for page_num, text, tables in iter_raw_pages(file_path, workers=workers, backend=backend):
+                jsonl_io.write_row(f, {"page": page_num, "text": text, "tables": tables})
+                yield page_num, text, tables
+        # Baru dipakai setelah semua halaman tertulis
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        # Termasuk GeneratorExit (pemanggil berhenti di tengah) dan KeyboardInterrupt
+        tmp_path.unlink(missing_ok=True)
+        raise
 
-def extract_pdf_detailed_bookmarks(file_path, output_path):
-    output_data = []
-    filename = Path(file_path).name
-    current_bookmark = None
-
-    bookmark_patterns = [
-        (r"^(BAB|Bab|bab)\s+([IVXLCDM]+|\d+)(\.|:)?\s*(.*)$", "main_chapter"),
-        (r"^(LAMPIRAN|Lampiran|lampiran)\s+([IVXLCDM]+|\d+|\w+)(\.|:)?\s*(.*)$", "appendix"),
-        (r"^(BAGIAN|Bagian|bagian)\s+([IVXLCDM]+|\d+)(\.|:)?\s*(.*)$", "section"),
-        (r"^(\d+\.\d+\.?\d*)\s+(.+)$", "subsection"),
-        (r"^([A-Z]\.|[a-z]\.)\s+(.+)$", "lettered_section"),
-        # Removed overly generic title_section pattern
-        # (r"^([A-Z][A-Z\s]{8,})$", "title_section")
-    ]
-
-    with pdfplumber.open(file_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            print(f"Processing page {page_num}...")
-
-            text = page.extract_text()
-            tables = page.extract_tables()
-
-            if not text:
-                continue
-
-            lines = text.split("\n")
-            table_index = 0
 
-            # Detect if this is a TOC page
-            toc_like_lines = sum(
-                1 for line in lines
-                if re.match(r"^(BAB|Bab|bab)\s+[IVXLCDM\d]+.*\.+\s+\d+$", line) or
-                   re.match(r"^\d+(\.\d+)+.*\.+\s+\d+$", line)
+# --- Tahap 2: deteksi bookmark & format tabel (murah, harus berurutan) ---
+def _build_trigram_index(lines):
+    index = defaultdict(set)
+    for line_id, line in enumerate(lines):
+        for k in range(len(line) - 2):
+            index[line[k:k + 3]].add(line_id)
+    return index
+
+
+def _cell_candidates(cell, index, cache):
+    """
+    Baris yang mungkin memuat cell: posting trigram paling jarang dari cell.
+    Return None untuk cell < 3 karakter (tidak bisa difilter lewat index).
+    """
+    if cell not in cache:
+        if len(cell) < 3:
+            cache[cell] = None
+        else:
+            cache[cell] = min(
+                (index.get(cell[k:k + 3], _EMPTY) for k in range(len(cell) - 2)),
+                key=len
             )
-            is_toc_page = toc_like_lines >= 3
-
-            table_lines_to_skip = set()
-            for table in tables:
-                if table and len(table) > 1:
-                    for row in table[1:]:
-                        non_empty_cells = [cell.strip() for cell in row if cell and cell.strip()]
-                        if len(non_empty_cells) >= 2:
-                            for line in lines:
-                                line_clean = line.strip()
-                                if line_clean:
-                                    cells_in_line = sum(1 for cell in non_empty_cells if cell in line_clean)
-                                    if cells_in_line == len(non_empty_cells) and len(line_clean.split()) <= len(non_empty_cells) + 2:
-                                        table_lines_to_skip.add(line_clean)
-
-            page_content = []
-            i = 0
-            bookmark_found_on_page = False
-
-            while i < len(lines):
-                line = lines[i].strip()
-
-                # Normalisasi kesalahan umum
-                line = re.sub(r"\bBABI\b", "BAB I", line, flags=re.IGNORECASE)
-
-                if not line:
-                    i += 1
-                    continue
-
-                bookmark_found = False
-                if not is_toc_page:
-                    for pattern, bookmark_type in bookmark_patterns:
-                        match = re.match(pattern, line)
-                        if match:
-                            if bookmark_type == "main_chapter":
-                                chapter_type = match.group(1).upper()
-                                chapter_num = match.group(2)
-                                title = match.group(4).strip() if len(match.groups()) >= 4 and match.group(4) else ""
-
-                                if not title and i + 1 < len(lines):
-                                    next_line = lines[i + 1].strip()
-                                    if next_line and not any(re.match(p[0], next_line) for p in bookmark_patterns):
-                                        title = next_line
-
-                                current_bookmark = f"{chapter_type} {chapter_num}" + (f" {title}" if title else "")
-
-                            elif bookmark_type == "appendix":
-                                app_type = match.group(1).upper()
-                                app_num = match.group(2)
-                                title = match.group(4).strip() if len(match.groups()) >= 4 and match.group(4) else ""
-                                current_bookmark = f"{app_type} {app_num}" + (f" {title}" if title else "")
-
-                            elif bookmark_type == "subsection":
-                                if current_bookmark and current_bookmark.startswith("BAB"):
-                                    pass
-                                else:
-                                    num = match.group(1)
-                                    title = match.group(2).strip()
-                                    current_bookmark = f"{num} {title}"
-
-                            elif bookmark_type == "lettered_section":
-                                pass  # Optional: you could handle A. / a. sections if needed
-
-                            bookmark_found = True
-                            bookmark_found_on_page = True
-                            break
-
-                if bookmark_found:
-                    page_content.append(line)
-                    i += 1
-                    continue
-
-                table_match = re.search(r"[Tt]abel\s*(\d+)", line, re.IGNORECASE)
-
-                if table_match and table_index < len(tables):
-                    page_content.append(line)
-                    table = tables[table_index]
-                    if table and len(table) > 1:
-                        headers = [h.strip() if h else f"Col{idx+1}" for idx, h in enumerate(table[0])]
-                        for row_idx, row in enumerate(table[1:], start=1):
-                            row_items = []
-                            for header, cell in zip(headers, row):
-                                cell_value = cell.strip() if cell else ""
-                                if cell_value:
-                                    row_items.append(f"{header}: {cell_value}")
-                            if row_items:
-                                page_content.append(f"{row_idx}. {'; '.join(row_items)}")
-
-                    table_index += 1
-                else:
-                    if line not in table_lines_to_skip:
-                        page_content.append(line)
-
-                i += 1
-
-            # Fallback: jika tidak ada bookmark eksplisit tapi ada sinyal kuat
-            if not bookmark_found_on_page:
-                lowered = text.lower()
-                if "daftar isi" in lowered:
-                    current_bookmark = "DAFTAR ISI"
-                elif "bab i" in lowered and "pendahuluan" in lowered:
-                    current_bookmark = "BAB I PENDAHULUAN"
-
-            if page_content:
-                page_entry = {
-                    "filename": filename,
-                    "page_number": page_num,
-                    "bookmark": current_bookmark,
-                    "content": "\n".join(page_content),
-                    "content_length": len("\n".join(page_content)),
-                    "has_tables": len([line for line in page_content if re.search(r"[Tt]abel\s*\d+", line)]) > 0
-                }
-                output_data.append(page_entry)
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        for entry in output_data:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-
-    print(f"Extraction completed. {len(output_data)} pages processed.")
+    return cache[cell]
+
+
+def find_table_lines_to_skip(tables, lines):
+    """
+    Cari baris teks yang merupakan duplikat baris tabel (semua cell non-kosong ada di baris itu
+    dan jumlah katanya <= jumlah cell + 2). Baris tersebut tidak ditulis ulang karena isi tabel
+    sudah diformat terpisah.
+
+    Pakai inverted index trigram -> baris, jadi untuk setiap row tabel hanya baris kandidat yang
+    dicek substring-nya, bukan semua baris x semua cell.
+    """
+    rows = []
+    for table in tables:
+        if table and len(table) > 1:
+            for row in table[1:]:
+                non_empty_cells = [cell.strip() for cell in row if cell and cell.strip()]
+                if len(non_empty_cells) >= 2:
+                    rows.append(non_empty_cells)
+
+    if not rows:
+        return set()
+
+    unique_lines = list(dict.fromkeys(line.strip() for line in lines if line.strip()))
+    word_counts = [len(line.split()) for line in unique_lines]
+    index = _build_trigram_index(unique_lines)
+    cache = {}
+
+    table_lines_to_skip = set()
+    for cells in rows:
+        candidate_ids = None
+        for cell in cells:
+            cell_ids = _cell_candidates(cell, index, cache)
+            if cell_ids is None:
+                continue
+            candidate_ids = cell_ids if candidate_ids is None else candidate_ids & cell_ids
+            if not candidate_ids:
+                break
+
+        if candidate_ids is None:
+            candidate_ids = range(len(unique_lines))
+
+        max_words = len(cells) + 2
+        for line_id in candidate_ids:
+            line = unique_lines[line_id]
+            if word_counts[line_id] <= max_words and all(cell in line for cell in cells):
+                table_lines_to_skip.add(line)
+
+    return table_lines_to_skip
+
+
+def process_page(page_num, text, tables, filename, current_bookmark):
+    """
+    Ubah teks & tabel mentah satu halaman menjadi page entry.
+    Return (page_entry atau None, current_bookmark terbaru) supaya state bookmark terbawa ke halaman berikutnya.
+    """
+    if not text:
+        return None, current_bookmark
+
+    tables = tables or []
+    lines = text.split("\n")
+    table_index = 0
+
+    # Detect if this is a TOC page
+    toc_like_lines = sum(1 for line in lines if is_toc_line(line))
+    is_toc_page = toc_like_lines >= 3
+
+    table_lines_to_skip = find_table_lines_to_skip(tables, lines)
+
+    page_content = []
+    i = 0
+    bookmark_found_on_page = False
+
+    while i < len(lines):
+        line = lines[i].strip()
+
+        # Normalisasi kesalahan umum
+        line = normalize_heading(line)
+
+        if not line:
+            i += 1
+            continue
+
+        heading = None if is_toc_page else classify_heading(line)
+        if heading:
+            if heading.kind == "main_chapter":
+                title = heading.title
+
+                if not title and i + 1 < len(lines):
+                    next_line = lines[i + 1].strip()
+                    if next_line and classify_heading(next_line) is None:
+                        title = next_line
+
+                current_bookmark = f"{heading.keyword} {heading.number}" + (f" {title}" if title else "")
+
+            elif heading.kind == "appendix":
+                current_bookmark = f"{heading.keyword} {heading.number}" + (f" {heading.title}" if heading.title else "")
+
+            elif heading.kind == "subsection":
+                if not (current_bookmark and current_bookmark.startswith("BAB")):
+                    current_bookmark = f"{heading.number} {heading.title}"
+
+            # section / lettered_section: tetap dihitung heading tapi tidak mengganti bookmark
+            bookmark_found_on_page = True
+            page_content.append(line)
+            i += 1
+            continue
+
+        table_match = TABLE_CAPTION_RE.search(line)
+
+        if table_match and table_index < len(tables):
+            page_content.append(line)
+            table = tables[table_index]
+            if table and len(table) > 1:
+                headers = [h.strip() if h else f"Col{idx+1}" for idx, h in enumerate(table[0])]
+                for row_idx, row in enumerate(table[1:], start=1):
+                    row_items = []
+                    for header, cell in zip(headers, row):
+                        cell_value = cell.strip() if cell else ""
+                        if cell_value:
+                            row_items.append(f"{header}: {cell_value}")
+                    if row_items:
+                        page_content.append(f"{row_idx}. {'; '.join(row_items)}")
+
+            table_index += 1
+        else:
+            if line not in table_lines_to_skip:
+                page_content.append(line)
+
+        i += 1
+
+    # Fallback: jika tidak ada bookmark eksplisit tapi ada sinyal kuat
+    if not bookmark_found_on_page:
+        lowered = text.lower()
+        if "daftar isi" in lowered:
+            current_bookmark = "DAFTAR ISI"
+        elif "bab i" in lowered and "pendahuluan" in lowered:
+            current_bookmark = "BAB I PENDAHULUAN"
+
+    if not page_content:
+        return None, current_bookmark
+
+    content = "\n".join(page_content)
+    page_entry = {
+        "filename": filename,
+        "page_number": page_num,
+        "bookmark": current_bookmark,
+        "content": content,
+        "content_length": len(content),
+        "has_tables": any(HAS_TABLE_RE.search(line) for line in page_content),
+        "content_hash": content_hash(content)
+    }
+    return page_entry, current_bookmark
+
+
+def resume_state_path(output_path):
+    return Path(f"{output_path}.resume.json")
+
+
+def resume_source(file_hash, backend):
+    # Sama dengan komponen key cache halaman (+ EXTRACTOR_VERSION untuk heuristik bookmark/tabel)
+    return {"file_sha256": file_hash, "backend": backend, "parser_version": PARSER_VERSION,
+            "extractor_version": EXTRACTOR_VERSION}
+
+
+def resume_source_matches(output_path, source):
+    state_path = resume_state_path(output_path)
+    if not state_path.exists():
+        return False
+    with open(state_path, "r", encoding="utf-8") as f:
+        return json.load(f) == source
+
+
+def save_resume_source(output_path, source):
+    state_path = resume_state_path(output_path)
+    tmp_path = state_path.with_name(f"{state_path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(source, f)
+    os.replace(tmp_path, state_path)
+
+
+def load_resume_state(output_path):
+    """
+    Baca output JSONL yang sudah ada untuk melanjutkan ekstraksi.
+    Baris terakhir yang terpotong (crash saat menulis) dibuang dari file.
+    Return (halaman terakhir, bookmark terakhir, jumlah entry, set bookmark).
+    """
+    last_page, last_bookmark, entries, bookmarks = 0, None, 0, set()
+    valid_size = 0
+    with open(output_path, "rb+") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            entry = jsonl_io.loads(raw)
+            valid_size += len(raw)
+            last_page, last_bookmark = entry["page_number"], entry["bookmark"]
+            entries += 1
+            if last_bookmark:
+                bookmarks.add(last_bookmark)
+        f.truncate(valid_size)
+    return last_page, last_bookmark, entries, bookmarks
+
+
+def extract_pdf_detailed_bookmarks(file_path, output_path, workers=1, backend="pdfplumber", resume=False,
+                                   cache_dir=None, file_hash=None):
+    """
+    Ekstrak PDF ke JSONL, satu entry per halaman. Setiap entry langsung ditulis & di-flush,
+    jadi memori tidak tumbuh dengan jumlah halaman dan crash tidak menghilangkan halaman
+    yang sudah selesai. Dengan resume=True ekstraksi dilanjutkan dari halaman setelah
+    entry terakhir di output_path, asalkan output itu dibuat dari hash file, backend dan
+    PARSER_VERSION/EXTRACTOR_VERSION yang sama (<output>.resume.json). Dengan cache_dir, hasil parsing halaman diambil/disimpan
+    di cache halaman (lihat iter_cached_pages).
+    """
+    filename = Path(file_path).name
+    current_bookmark = None
+    pages_written = 0
+    bookmarks = set()
+    start_page = 1
+    tables_extracted = 0
+    tables_skipped = 0
+
+    # Output setengah jadi hanya dilanjutkan kalau berasal dari file, backend & versi parser yang sama
+    file_hash = file_hash or file_sha256(file_path)
+    source = resume_source(file_hash, backend)
+    if resume and Path(output_path).exists() and not resume_source_matches(output_path, source):
+        print("[INFO] Output sebelumnya berasal dari PDF/backend/versi parser lain, ekstraksi dimulai dari awal.")
+        resume = False
+
+    if resume and Path(output_path).exists():
+        last_page, current_bookmark, pages_written, bookmarks = load_resume_state(output_path)
+        start_page = last_page + 1
+        print(f"Resuming from page {start_page} ({pages_written} pages already written).")
+        mode = "a"
+    else:
+        mode = "w"
+        save_resume_source(output_path, source)
+
+    if cache_dir:
+        cache_path = page_cache_path(cache_dir, file_hash, backend)
+        raw_pages = iter_cached_pages(file_path, cache_path, workers=workers, backend=backend, start_page=start_page)
+    else:
+        raw_pages = iter_raw_pages(file_path, workers=workers, backend=backend, start_page=start_page)
+
+    with open(output_path, mode, encoding="utf-8") as f:
+        for page_num, text, tables in raw_pages:
+            if tables is None:
+                tables_skipped += 1
+            else:
+                tables_extracted += 1
+
+            page_entry, current_bookmark = process_page(page_num, text, tables, filename, current_bookmark)
+            if page_entry:
+                jsonl_io.write_row(f, page_entry)
+                f.flush()
+                pages_written += 1
+                if page_entry["bookmark"]:
+                    bookmarks.add(page_entry["bookmark"])
+
+    print(f"Extraction completed. {pages_written} pages processed.")
     print(f"Output saved to: {output_path}")
+    print(f"Table extraction: {tables_extracted} pages extracted, {tables_skipped} pages skipped.")
 
-    bookmarks = set(entry["bookmark"] for entry in output_data if entry["bookmark"])
     print(f"Found {len(bookmarks)} unique bookmarks:")
     for bookmark in sorted(bookmarks):
         print(f"  - {bookmark}")
 
-    return output_data
+    return {
+        "pages": pages_written,
+        "bookmarks": sorted(bookmarks),
+        "tables_extracted": tables_extracted,
+        "tables_skipped": tables_skipped,
+    }
 
 BASE_DIR = Path(__file__).resolve().parent.parent  # /home/dwmhr/pln-etl
 
-def run_ekstrak():
-    file_path = BASE_DIR / "data/raw/PDF_ATURAN_HC/EDIR-2023.0050-Peraturan Pelaksana Standar Prosedur Manajemen Talenta dan Pegawai.pdf"
-    logging.info("=== Mulai ekstraksi PDF ===")
+def find_pdfs(input_dir):
+    return sorted(path for path in Path(input_dir).rglob("*") if path.is_file() and path.suffix.lower() == ".pdf")
+
+
+def read_page_hashes(output_path):
+    with open(output_path, "r", encoding="utf-8") as f:
+        return {str(entry["page_number"]): entry["content_hash"] for entry in map(jsonl_io.loads, f)}
+
+
+def extract_document(file_path, output_root, workers=1, backend="pdfplumber", resume=False, incremental=True, cache_dir=None):
+    """
+    Ekstrak satu PDF ke folder output-nya sendiri (output_root/<nama file>/<nama file>_ekstrak.jsonl).
+    Error tidak di-raise supaya satu dokumen rusak tidak menghentikan batch; dicatat di record manifest.
+
+    Dengan incremental=True, dokumen yang hash file, backend dan versi parser/ekstraktornya sama dengan
+    manifest sebelumnya di-skip, dan manifest mencatat halaman mana yang content-nya berubah untuk stage berikutnya.
+    """
+    file_path = Path(file_path)
+    name_without_ext = file_path.name.rsplit(".", 1)[0]
+    output_folder = Path(output_root) / name_without_ext
+    output_file = output_folder / f"{name_without_ext}_ekstrak.jsonl"
+    manifest_path = output_folder / f"{name_without_ext}_manifest.json"
+
+    record = {
+        "file": str(file_path),
+        "output": str(output_file),
+        "pages": 0,
+        "bytes": file_path.stat().st_size if file_path.exists() else 0,
+        "duration": 0.0,
+        "skipped": False,
+        "changed_pages": 0,
+        "error": None,
+    }
+    start_time = time.time()
     try:
-        filename = file_path.name
-        name_without_ext = filename.rsplit(".", 1)[0]
-        output_folder = BASE_DIR / "data/processed" / name_without_ext
         output_folder.mkdir(parents=True, exist_ok=True)
-        output_file = output_folder / f"{name_without_ext}_ekstrak.jsonl"
-        extract_pdf_detailed_bookmarks(str(file_path), str(output_file))
-        logging.info(f"=== Ekstraksi selesai untuk {filename} ===")
+        file_hash = file_sha256(file_path)
+        previous = load_manifest(manifest_path) or {}
+        # Hash file + backend + PARSER_VERSION/EXTRACTOR_VERSION, sama dengan key resume
+        source = resume_source(file_hash, backend)
+        same_parsing = all(previous.get(key) == source[key] for key in ("backend", "parser_version", "extractor_version"))
+
+        if (incremental and previous.get("complete") and output_file.exists()
+                and previous.get("file_sha256") == file_hash and same_parsing):
+            print(f"[SKIP] {file_path.name} tidak berubah sejak run sebelumnya.")
+            previous["changed_pages"] = []
+            previous["removed_pages"] = []
+            save_manifest(manifest_path, previous)
+            record.update(pages=len(previous["pages"]), skipped=True)
+        else:
+            # Tandai belum selesai dulu supaya output setengah jadi tidak pernah dianggap up to date
+            # Backend/versi lain -> semua halaman dihitung berubah
+            previous_pages = previous.get("pages", {}) if same_parsing else {}
+            if not same_parsing:
+                # Field selain content (has_tables, tables, bookmark) juga bisa berbeda -> semua stage jalan lagi
+                invalidate_stages(previous, *previous.get("stages", {}))
+            save_manifest(manifest_path, {**previous, "complete": False})
+
+            summary = extract_pdf_detailed_bookmarks(str(file_path), str(output_file), workers=workers, backend=backend,
+                                                     resume=resume, cache_dir=cache_dir, file_hash=file_hash)
+            pages = read_page_hashes(output_file)
+            changed_pages = sorted((int(page) for page, h in pages.items() if previous_pages.get(page) != h))
+            removed_pages = sorted(int(page) for page in previous_pages.keys() - pages.keys())
+
+            save_manifest(manifest_path, {
+                "file": str(file_path),
+                **source,
+                "complete": True,
+                "pages": pages,
+                "changed_pages": changed_pages,
+                "removed_pages": removed_pages,
+                "fingerprint": pages_fingerprint(pages),
+                "stages": previous.get("stages", {}),
+            })
+            print(f"[INFO] {len(changed_pages)} changed pages, {len(removed_pages)} removed pages.")
+            record.update(pages=summary["pages"], changed_pages=len(changed_pages))
     except Exception as e:
         logging.exception(f"Terjadi error saat ekstraksi {file_path}: {e}")
-        raise
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["duration"] = round(time.time() - start_time, 3)
+    return record
+
+
+def extract_directory(input_dir, output_root, doc_workers=1, workers=1, backend="pdfplumber", resume=False, incremental=True,
+                      cache_dir=None):
+    """
+    Ekstrak semua PDF di input_dir (rekursif) secara paralel per dokumen, lalu tulis
+    run manifest (pages, bytes, duration, error per file) ke output_root/ekstrak_manifest.json.
+    Total proses = doc_workers x workers.
+    """
+    pdf_files = find_pdfs(input_dir)
+    print(f"[INFO] Found {len(pdf_files)} PDF files in {input_dir}")
+
+    started_at = datetime.now().isoformat(timespec="seconds")
+    start_time = time.time()
+    if doc_workers <= 1:
+        records = [extract_document(path, output_root, workers, backend, resume, incremental, cache_dir) for path in pdf_files]
+    else:
+        n = len(pdf_files)
+        with ProcessPoolExecutor(max_workers=doc_workers) as executor:
+            records = list(executor.map(extract_document, pdf_files, [output_root] * n, [workers] * n, [backend] * n,
+                                        [resume] * n, [incremental] * n, [cache_dir] * n))
+    elapsed_time = time.time() - start_time
+
+    manifest = {
+        "started_at": started_at,
+        "input_dir": str(input_dir),
+        "backend": backend,
+        "doc_workers": doc_workers,
+        "workers": workers,
+        "duration": round(elapsed_time, 3),
+        "documents": len(records),
+        "failed": sum(1 for record in records if record["error"]),
+        "skipped": sum(1 for record in records if record["skipped"]),
+        "pages": sum(record["pages"] for record in records),
+        "bytes": sum(record["bytes"] for record in records),
+        "files": records,
+    }
+    Path(output_root).mkdir(parents=True, exist_ok=True)
+    manifest_path = Path(output_root) / "ekstrak_manifest.json"
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    print(f"[DONE] {manifest['documents']} documents ({manifest['skipped']} unchanged), {manifest['pages']} pages, "
+          f"{manifest['failed']} failed in {elapsed_time:.2f} seconds.")
+    print(f"[INFO] Manifest saved to: {manifest_path}")
+    return manifest
+
+
+def run_ekstrak(workers=1, backend="pdfplumber", resume=None, input_dir=None, doc_workers=1, force=False, use_cache=True,
+                **context):
+    # Default: lanjutkan output sebelumnya kalau task Airflow sedang di-retry
+    if resume is None:
+        resume = "ti" in context and context["ti"].try_number > 1
+
+    output_root = BASE_DIR / "data/processed"
+    cache_dir = BASE_DIR / "data/cache/pages" if use_cache else None
+    if cache_dir:
+        sweep_cache_tmp(cache_dir)
+
+    # Mode batch: scan semua PDF di input_dir
+    if input_dir is not None:
+        logging.info(f"=== Mulai ekstraksi batch PDF dari {input_dir} ===")
+        manifest = extract_directory(input_dir, output_root, doc_workers=doc_workers, workers=workers, backend=backend,
+                                     resume=resume, incremental=not force, cache_dir=cache_dir)
+        if manifest["failed"]:
+            raise RuntimeError(f"{manifest['failed']} dari {manifest['documents']} dokumen gagal diekstrak, lihat ekstrak_manifest.json")
+        logging.info("=== Ekstraksi batch selesai ===")
+        return
+
+    file_path = BASE_DIR / "data/raw/PDF_ATURAN_HC/EDIR-2023.0050-Peraturan Pelaksana Standar Prosedur Manajemen Talenta dan Pegawai.pdf"
+    logging.info("=== Mulai ekstraksi PDF ===")
+    record = extract_document(file_path, output_root, workers=workers, backend=backend, resume=resume,
+                              incremental=not force, cache_dir=cache_dir)
+    if record["error"]:
+        raise RuntimeError(f"Terjadi error saat ekstraksi {file_path}: {record['error']}")
+    logging.info(f"=== Ekstraksi selesai untuk {file_path.name} ===")
 
 if __name__ == "__main__":
     run_ekstrak()
-
-
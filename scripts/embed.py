@@ -1,88 +1,39 @@
-from pymilvus import connections, Collection, CollectionSchema, FieldSchema, DataType, utility
-from sentence_transformers import SentenceTransformer
-import json
+from itertools import islice
+from pymilvus import connections
+from model_client import get_encoder
+from generate_embedding import meta_row
+from milvus_ingest import ingest
+import jsonl_io
 
 # 1. Koneksi ke Milvus
 connections.connect("default", host="localhost", port="19530")
 
 # 2. Load model embedding 
-model = SentenceTransformer("intfloat/multilingual-e5-large", device='cpu')
-
-# 3. Baca data dari file JSONL
-documents = []
-with open("chunked_token.jsonl", "r", encoding="utf-8") as f:
-    for line in f:
-        item = json.loads(line)
-        documents.append(item)
-
-print(f"Loaded {len(documents)} documents")
-
-# 4. Siapkan field untuk dimasukkan ke Milvus
-texts, file_names, page_numbers, bookmarks = [], [], [], []
-text_lengths, has_tables_flags, chapter_titles = [], [], []
-
-print("Processing documents...")
-
-for doc in documents:
-    texts.append(doc["text"])
-    file_names.append(doc.get("file_name", ""))
-    page_numbers.append(doc.get("page_number", 0))
-    bookmarks.append(doc.get("bookmark", ""))
-    text_lengths.append(doc.get("text_length", len(doc["text"])))
-    has_tables_flags.append(doc.get("has_tables", False))
-    chapter_titles.append(doc.get("chapter_title", ""))
-
-# 5. Generate embeddings (GANTI di sini)
-print("Generating embeddings...")
-# bge-m3: gunakan mean pooling default dan JANGAN dinormalisasi
-embeddings = model.encode(texts, normalize_embeddings=False).tolist()
-
-# 6. Siapkan collection schema
+model = get_encoder("intfloat/multilingual-e5-large")
+
+# 3. Baca chunk dari file JSONL secara streaming & encode per batch. Encode batch berikutnya berjalan di
+#    thread latar milvus_ingest sementara batch sebelumnya di-insert.
+ENCODE_BATCH_SIZE = 64
+
+
+def iter_encoded_records(path, batch_size=ENCODE_BATCH_SIZE):
+    documents = jsonl_io.iter_jsonl(path)
+    while True:
+        rows = [meta_row(doc) for doc in islice(documents, batch_size)]
+        if not rows:
+            break
+        # bge-m3: gunakan mean pooling default dan JANGAN dinormalisasi
+        embeddings = model.encode([row["text"] for row in rows], normalize_embeddings=False)
+        yield from zip(rows, embeddings)
+
+
+# 4. Collection dibuat ulang, lalu insert per batch berukuran byte (lihat milvus_ingest.py)
+print("Generating embeddings & inserting data to Milvus...")
 collection_name = "pln_embeddings_simplified"
-if collection_name in utility.list_collections():
-    print(f"Dropping existing collection: {collection_name}")
-    utility.drop_collection(collection_name)
-
-dim = len(embeddings[0])
-fields = [
-    FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
-    FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=65535),
-    FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=dim),
-    FieldSchema(name="file_name", dtype=DataType.VARCHAR, max_length=512),
-    FieldSchema(name="page_number", dtype=DataType.INT64),
-    FieldSchema(name="bookmark", dtype=DataType.VARCHAR, max_length=1024),
-    FieldSchema(name="text_length", dtype=DataType.INT64),
-    FieldSchema(name="has_tables", dtype=DataType.BOOL),
-    FieldSchema(name="chapter_title", dtype=DataType.VARCHAR, max_length=1024),
-]
-
-schema = CollectionSchema(fields, description="Simplified PLN embedding with selected metadata")
-collection = Collection(name=collection_name, schema=schema)
-
-# 7. Buat index
-print("Creating index...")
-collection.create_index(field_name="embedding", index_params={
-    "metric_type": "COSINE",
-    "index_type": "IVF_FLAT",
-    "params": {"nlist": 128}
-})
-
-# 8. Insert data
-print("Inserting data to Milvus...")
-insert_data = [
-    texts,
-    embeddings,
-    file_names,
-    page_numbers,
-    bookmarks,
-    text_lengths,
-    has_tables_flags,
-    chapter_titles
-]
-collection.insert(insert_data)
-collection.load()
-
-print(f"\n{len(texts)} dokumen berhasil di-insert ke Milvus.")
+collection, stats = ingest(iter_encoded_records("chunked_token.jsonl"), collection_name, drop_existing=True,
+                           description="Simplified PLN embedding with selected metadata")
+
+print(f"\n{stats['rows']} dokumen berhasil di-insert ke Milvus.")
 
 # ======================
 # Fungsi Update Metadata
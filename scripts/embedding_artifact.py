@@ -0,0 +1,148 @@
+import json
+import os
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+import jsonl_io
+
+# --- Artifact embedding biner (output generate_embedding.py, input insert_to_milvus.py) ---
+#   <dokumen>_ekstrak_chunked_embedding.npy         -> matriks vektor (n_chunk, dim), float32/float16
+#   <dokumen>_ekstrak_chunked_embedding_meta.jsonl  -> metadata per chunk tanpa vektor (ChunkRecord),
+#                                                      baris ke-i = vektor ke-i
+# File .npy dibaca lewat memory mapping, jadi insert hanya memegang satu batch vektor di memori.
+
+# float16 memangkas ukuran file setengahnya lagi; vektor dikembalikan ke float32 saat dibaca
+EMBED_DTYPE = os.environ.get("EMBED_DTYPE", "float32")
+
+
+def meta_path_for(vectors_path):
+    vectors_path = Path(vectors_path)
+    return vectors_path.with_name(f"{vectors_path.stem}_meta.jsonl")
+
+
+def write_embedding_artifact(vectors_path, embeddings, rows, dtype=EMBED_DTYPE):
+    """Tulis vektor (.npy) + metadata (.jsonl). Ditulis ke file sementara lalu rename."""
+    vectors_path = Path(vectors_path)
+    meta_path = meta_path_for(vectors_path)
+
+    tmp_vectors = vectors_path.with_name(f"{vectors_path.name}.tmp")
+    with open(tmp_vectors, "wb") as f:
+        np.save(f, np.asarray(embeddings).astype(dtype, copy=False))
+    tmp_meta = meta_path.with_name(f"{meta_path.name}.tmp")
+    jsonl_io.write_jsonl(tmp_meta, rows)
+
+    os.replace(tmp_meta, meta_path)
+    os.replace(tmp_vectors, vectors_path)
+    return vectors_path, meta_path
+
+
+def load_vectors(vectors_path):
+    return np.load(vectors_path, mmap_mode="r")
+
+
+def iter_embedding_batches(vectors_path, batch_size=1000):
+    """Yield (rows metadata, vektor float32) per batch, vektor dibaca dari .npy lewat mmap."""
+    vectors = load_vectors(vectors_path)
+    meta = jsonl_io.iter_jsonl(meta_path_for(vectors_path))
+    start = 0
+    while True:
+        rows = list(islice(meta, batch_size))
+        if not rows:
+            break
+        batch = np.asarray(vectors[start:start + len(rows)], dtype=np.float32)
+        if len(batch) != len(rows):
+            raise ValueError(f"Jumlah vektor di {vectors_path} lebih sedikit dari baris metadata")
+        start += len(rows)
+        yield rows, batch
+
+    if start != len(vectors):
+        raise ValueError(f"Jumlah vektor ({len(vectors)}) tidak sama dengan baris metadata ({start})")
+
+
+# --- Penulisan streaming + checkpoint ---
+# Vektor ditulis per window ke <artifact>.npy.tmp (open_memmap, ukuran penuh dialokasikan di awal) dan
+# metadata di-append ke <artifact>_meta.jsonl.tmp. Setelah data satu window di-flush ke disk, checkpoint
+# {rows_done, meta_bytes} ditulis atomik. Task yang di-retry dengan input & parameter yang sama
+# melanjutkan dari checkpoint itu; metadata yang sempat ditulis setelah checkpoint dipotong.
+
+def checkpoint_path_for(vectors_path):
+    vectors_path = Path(vectors_path)
+    return vectors_path.with_name(f"{vectors_path.name}.checkpoint.json")
+
+
+class ArtifactWriter:
+    def __init__(self, vectors_path, n_rows, params, dtype=EMBED_DTYPE):
+        self.vectors_path = Path(vectors_path)
+        self.meta_path = meta_path_for(self.vectors_path)
+        self.tmp_vectors = self.vectors_path.with_name(f"{self.vectors_path.name}.tmp")
+        self.tmp_meta = self.meta_path.with_name(f"{self.meta_path.name}.tmp")
+        self.checkpoint_path = checkpoint_path_for(self.vectors_path)
+        self.n_rows = n_rows
+        # params: apa pun yang menentukan isi output (hash input, model, backend, dtype)
+        self.params = {**params, "dtype": dtype, "n_rows": n_rows}
+        self.dtype = dtype
+        self.rows_done = 0
+        self.vectors = None
+        self.meta_file = None
+
+        checkpoint = self.load_checkpoint()
+        if checkpoint is not None:
+            self.vectors = np.lib.format.open_memmap(self.tmp_vectors, mode="r+")
+            self.meta_file = open(self.tmp_meta, "r+b")
+            self.meta_file.truncate(checkpoint["meta_bytes"])
+            self.meta_file.seek(checkpoint["meta_bytes"])
+            self.rows_done = checkpoint["rows_done"]
+
+    def load_checkpoint(self):
+        if not self.checkpoint_path.exists():
+            return None
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("params") != self.params or not self.tmp_vectors.exists() or not self.tmp_meta.exists():
+            print("[INFO] Checkpoint embedding lama tidak cocok dengan input/parameter sekarang, mulai dari awal.")
+            return None
+        return checkpoint
+
+    def save_checkpoint(self):
+        checkpoint = {"params": self.params, "rows_done": self.rows_done, "meta_bytes": self.meta_file.tell()}
+        tmp_path = self.checkpoint_path.with_name(f"{self.checkpoint_path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def append(self, embeddings, rows):
+        if self.vectors is None:
+            self.vectors = np.lib.format.open_memmap(self.tmp_vectors, mode="w+", dtype=self.dtype,
+                                                     shape=(self.n_rows, embeddings.shape[1]))
+            self.meta_file = open(self.tmp_meta, "wb")
+
+        end = self.rows_done + len(rows)
+        self.vectors[self.rows_done:end] = embeddings
+        for row in rows:
+            self.meta_file.write((jsonl_io.dumps(row) + "\n").encode("utf-8"))
+
+        # Data window harus sudah di disk sebelum checkpoint menunjuk ke sana
+        self.vectors.flush()
+        self.meta_file.flush()
+        os.fsync(self.meta_file.fileno())
+        self.rows_done = end
+        self.save_checkpoint()
+
+    def finish(self):
+        if self.vectors is None:
+            # Input kosong
+            return write_embedding_artifact(self.vectors_path, np.empty((0, 0)), [], dtype=self.dtype)
+        if self.rows_done != self.n_rows:
+            raise ValueError(f"Baru {self.rows_done} dari {self.n_rows} vektor yang ditulis")
+
+        self.vectors.flush()
+        self.vectors = None
+        self.meta_file.close()
+        os.replace(self.tmp_meta, self.meta_path)
+        os.replace(self.tmp_vectors, self.vectors_path)
+        self.checkpoint_path.unlink()
+        return self.vectors_path, self.meta_path
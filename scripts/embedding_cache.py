@@ -0,0 +1,125 @@
+import hashlib
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+# --- Cache embedding persisten (content-addressed) ---
+# Key = sha256(model + revision + teks ternormalisasi), value = vektor embedding (bytes numpy).
+# Chunk yang tidak berubah antar run, atau boilerplate yang sama di banyak dokumen, cukup di-encode
+# sekali. Cache dibatasi ukuran (EMBED_CACHE_MAX_MB); kalau lewat batas, entry yang paling lama
+# tidak dipakai dibuang dulu (LRU).
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CACHE_PATH = BASE_DIR / "data/cache/embeddings.sqlite"
+CACHE_MAX_BYTES = int(os.environ.get("EMBED_CACHE_MAX_MB", "2048")) * 1024 * 1024
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+# SQLite membatasi jumlah parameter per query
+_LOOKUP_BATCH = 500
+
+
+def normalize_text(text):
+    # Tokenizer sentencepiece (bge-m3, e5) juga menormalisasi unicode & spasi berlebih,
+    # jadi teks yang hanya beda spasi menghasilkan embedding yang sama
+    return WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class EmbeddingCache:
+    def __init__(self, model_name, revision="main", path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.model_name = model_name
+        self.revision = revision
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # timeout: beberapa task Airflow bisa memakai cache yang sama bersamaan
+        self.conn = sqlite3.connect(str(path), timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, model TEXT, dtype TEXT, vector BLOB, size INTEGER, last_used REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.conn.commit()
+
+    def key(self, text):
+        payload = f"{self.model_name}\0{self.revision}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: vector} untuk key yang ada di cache; last_used entry yang ketemu diperbarui."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for i in range(0, len(unique_keys), _LOOKUP_BATCH):
+            batch = unique_keys[i:i + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            )
+            for key, dtype, vector in rows:
+                found[key] = np.frombuffer(vector, dtype=dtype)
+
+        now = time.time()
+        self.conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+        self.conn.commit()
+
+        hits = sum(1 for key in keys if key in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items):
+        """Simpan pasangan (key, vector), lalu evict kalau ukuran cache melewati max_bytes."""
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            vector = np.ascontiguousarray(vector)
+            rows.append((key, self.model_name, vector.dtype.str, vector.tobytes(), vector.nbytes, now))
+        self.conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+        self.evict()
+
+    def size_bytes(self):
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    def evict(self):
+        excess = self.size_bytes() - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        victims = []
+        for key, size in self.conn.execute("SELECT key, size FROM embeddings ORDER BY last_used"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+        self.conn.commit()
+        self.evicted += len(victims)
+        return len(victims)
+
+    def report(self):
+        total = self.hits + self.misses
+        hit_ratio = self.hits / total if total else 0.0
+        print(f"[CACHE] Embedding cache: {self.hits} hits, {self.misses} misses ({hit_ratio:.1%} hit), "
+              f"{self.evicted} evicted, size {self.size_bytes() / 1024 / 1024:.1f} / {self.max_bytes / 1024 / 1024:.0f} MB")
+        return {"hits": self.hits, "misses": self.misses, "evicted": self.evicted}
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    if not CACHE_PATH.exists():
+        raise SystemExit(f"[INFO] Cache belum ada: {CACHE_PATH}")
+    conn = sqlite3.connect(str(CACHE_PATH))
+    for model, count, size in conn.execute("SELECT model, COUNT(*), SUM(size) FROM embeddings GROUP BY model"):
+        print(f"{model}: {count} entries, {size / 1024 / 1024:.1f} MB")
@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+# --- Encoder embedding bersama untuk pipeline & script query ---
+# Backend:
+#   torch      -> SentenceTransformer (fp32 PyTorch, perilaku lama)
+#   onnx       -> model yang sama diekspor ke ONNX, dijalankan dengan ONNX Runtime
+#   onnx-int8  -> ONNX + dynamic quantization int8 (paling cepat di CPU)
+# Semua backend punya encode(texts, batch_size, normalize_embeddings, show_progress_bar), .tokenizer
+# dan .max_seq_length seperti SentenceTransformer, jadi bisa saling ganti.
+#
+# Export & validasi:
+#   python scripts/encoders.py export --model BAAI/bge-m3 --quantize
+#   python scripts/encoders.py validate --model BAAI/bge-m3 --backend onnx-int8 --input <chunked.jsonl>
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ONNX_DIR = BASE_DIR / "models/onnx"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_BACKEND = os.environ.get("ENCODER_BACKEND", "torch")
+
+
+def onnx_model_dir(model_name):
+    return ONNX_DIR / model_name.replace("/", "__")
+
+
+def export_onnx(model_name, quantize=False, output_dir=None):
+    """
+    Ekspor transformer dari SentenceTransformer ke ONNX (model.onnx) + tokenizer dan konfigurasi
+    pooling/normalisasi (encoder_config.json). Dengan quantize=True juga membuat model_int8.onnx.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    output_dir = Path(output_dir or onnx_model_dir(model_name))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = output_dir / "model.onnx"
+
+    if not fp32_path.exists():
+        print(f"[INFO] Exporting {model_name} to {fp32_path}...")
+        st_model = SentenceTransformer(model_name, device="cpu")
+        transformer = st_model[0].auto_model.eval()
+        tokenizer = st_model.tokenizer
+        pooling = next(module for module in st_model if isinstance(module, Pooling))
+        if pooling.get_pooling_mode_str() not in ("cls", "mean"):
+            raise ValueError(f"Pooling {pooling.get_pooling_mode_str()} belum didukung backend ONNX")
+
+        dummy = tokenizer(["contoh kalimat"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            # Model > 2GB (misalnya bge-m3) otomatis disimpan dengan external data di folder yang sama
+            torch.onnx.export(
+                transformer, tuple(dummy[name] for name in input_names), str(fp32_path),
+                input_names=input_names, output_names=["last_hidden_state"], dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+
+        tokenizer.save_pretrained(output_dir)
+        config = {
+            "model_name": model_name,
+            "pooling": pooling.get_pooling_mode_str(),
+            "normalize": any(isinstance(module, Normalize) for module in st_model),
+            "max_seq_length": st_model.max_seq_length,
+        }
+        with open(output_dir / "encoder_config.json", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+    int8_path = output_dir / "model_int8.onnx"
+    if quantize and not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        print(f"[INFO] Quantizing {fp32_path.name} -> {int8_path.name} (int8)...")
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8, use_external_data_format=True)
+
+    return output_dir
+
+
+class OnnxEncoder:
+    """Encoder ONNX Runtime dengan pooling & normalisasi yang sama seperti SentenceTransformer asalnya."""
+
+    def __init__(self, model_dir, quantized=False, threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        with open(model_dir / "encoder_config.json", "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = self.config["max_seq_length"]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        model_path = model_dir / ("model_int8.onnx" if quantized else "model.onnx")
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def pool(self, hidden, attention_mask):
+        if self.config["pooling"] == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, show_progress_bar=False, **kwargs):
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size, normalize_embeddings)[0]
+
+        outputs = []
+        for i in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(list(texts[i:i + batch_size]), padding=True, truncation=True,
+                                    max_length=self.max_seq_length, return_tensors="np")
+            feed = {name: inputs[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feed)[0]
+            outputs.append(self.pool(hidden, inputs["attention_mask"]))
+
+        embeddings = np.concatenate(outputs).astype(np.float32) if outputs else np.empty((0, 0), dtype=np.float32)
+        if self.config["normalize"] or normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+
+def load_encoder(model_name, backend=None, threads=None):
+    """Load encoder untuk model_name. Model ONNX diekspor otomatis saat pertama dipakai."""
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend} (pilihan: {', '.join(BACKENDS)})")
+
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name, device="cpu")
+
+    quantized = backend == "onnx-int8"
+    model_dir = export_onnx(model_name, quantize=quantized)
+    return OnnxEncoder(model_dir, quantized=quantized, threads=threads)
+
+
+# --- Validasi ONNX vs PyTorch ---
+def top_k_neighbors(embeddings, k):
+    normed = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+    scores = normed @ normed.T
+    np.fill_diagonal(scores, -np.inf)
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def validate(model_name, backend, texts, k=10, batch_size=16):
+    results = {}
+    for name in ("torch", backend):
+        encoder = load_encoder(model_name, backend=name)
+        start_time = time.perf_counter()
+        embeddings = encoder.encode(texts, batch_size=batch_size)
+        results[name] = (np.asarray(embeddings, dtype=np.float32), time.perf_counter() - start_time)
+
+    reference, torch_time = results["torch"]
+    candidate, candidate_time = results[backend]
+    cosine = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+
+    # Overlap retrieval: tiap chunk sampel jadi query ke chunk sampel lain
+    k = min(k, len(texts) - 1)
+    reference_top = top_k_neighbors(reference, k)
+    candidate_top = top_k_neighbors(candidate, k)
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(reference_top, candidate_top)])
+
+    print(f"{len(texts)} chunks, model {model_name}, backend {backend}")
+    print(f"cosine vs torch : mean {cosine.mean():.5f} | min {cosine.min():.5f}")
+    print(f"overlap@{k:<7}: {overlap:.3f}")
+    print(f"torch           : {len(texts) / torch_time:8.1f} chunks/s")
+    print(f"{backend:<16}: {len(texts) / candidate_time:8.1f} chunks/s ({torch_time / candidate_time:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export & validasi encoder ONNX")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export")
+    export_parser.add_argument("--model", default="BAAI/bge-m3")
+    export_parser.add_argument("--quantize", action="store_true")
+
+    validate_parser = subparsers.add_parser("validate")
+    validate_parser.add_argument("--model", default="BAAI/bge-m3")
+    validate_parser.add_argument("--backend", default="onnx-int8", choices=BACKENDS[1:])
+    validate_parser.add_argument("--input", required=True, help="JSONL hasil chunking sebagai sampel")
+    validate_parser.add_argument("--sample", type=int, default=200)
+    validate_parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(f"[DONE] Exported to {export_onnx(args.model, quantize=args.quantize)}")
+    else:
+        import jsonl_io
+        texts = [row["text"] for row in jsonl_io.iter_jsonl(args.input) if row.get("text")][:args.sample]
+        validate(args.model, args.backend, texts, k=args.k)
+
+
+if __name__ == "__main__":
+    main()
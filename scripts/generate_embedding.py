@@ -1,57 +1,324 @@
-import json
-import time  
+import multiprocessing
+import os
+import time
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+import numpy as np
+import jsonl_io
+from embedding_artifact import EMBED_DTYPE, ArtifactWriter
+from embedding_cache import EmbeddingCache
+from encoders import DEFAULT_BACKEND, load_encoder
+from model_client import get_encoder, get_tokenizer
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-def generate_embeddings():
-    start_time = time.time()  
+EMBED_MODEL = "BAAI/bge-m3"
+# Naikkan kalau bobot model diganti (misalnya pin ke commit HF lain) supaya cache embedding lama tidak dipakai
+EMBED_MODEL_REVISION = os.environ.get("EMBED_MODEL_REVISION", "main")
+
+# Budget token per batch encode, termasuk padding (= jumlah chunk x panjang token terpanjang di batch)
+EMBED_TOKEN_BUDGET = 8192
+EMBED_MAX_BATCH_SIZE = 64
+# Jumlah chunk per window streaming; satu window = satu checkpoint
+EMBED_WINDOW_SIZE = 2048
+
+
+# --- Batching berbasis panjang token ---
+# Chunk diurutkan dari yang terpanjang lalu dikelompokkan selama total token ber-padding masih di bawah
+# budget: chunk pendek masuk batch besar, chunk panjang batch kecil, dan hampir tidak ada padding.
+def token_lengths(texts, tokenizer, max_length, batch_size=1024):
+    lengths = []
+    for i in range(0, len(texts), batch_size):
+        encoded = tokenizer(texts[i:i + batch_size], add_special_tokens=True, truncation=True, max_length=max_length)
+        lengths.extend(len(ids) for ids in encoded["input_ids"])
+    return lengths
+
+
+def plan_token_batches(lengths, token_budget=EMBED_TOKEN_BUDGET, max_batch_size=EMBED_MAX_BATCH_SIZE):
+    """Return list batch (list index chunk), diurutkan dari chunk terpanjang."""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches = []
+    batch = []
+    for i in order:
+        # Batch diurutkan menurun, jadi chunk pertama = panjang padding batch
+        if batch and (len(batch) >= max_batch_size or (len(batch) + 1) * lengths[batch[0]] > token_budget):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def padded_tokens(lengths, batches):
+    return sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+
+
+def fixed_size_batches(texts, batch_size):
+    """Batching lama: SentenceTransformer.encode mengurutkan teks per panjang karakter lalu batch_size tetap."""
+    order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def iter_encoded_batches(model, texts, batches):
+    for batch in batches:
+        yield batch, model.encode([texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False)
+
+
+def gather_embeddings(n_texts, encoded, n_batches):
+    """Kumpulkan (batch, vectors) ke satu array sesuai urutan asli texts."""
+    embeddings = None
+    for n, (batch, vectors) in enumerate(encoded, 1):
+        if embeddings is None:
+            embeddings = np.empty((n_texts, vectors.shape[1]), dtype=vectors.dtype)
+        embeddings[batch] = vectors
+        if n % 50 == 0 or n == n_batches:
+            print(f"[BATCH] {n} / {n_batches} batches encoded.")
+    return embeddings
+
+
+# --- Pool embedding multi-proses (CPU) ---
+# Setiap worker dipin ke potongan core sendiri dengan jumlah thread torch = jumlah core-nya, jadi
+# worker tidak saling berebut core (oversubscription). Model di-load sekali per worker.
+_worker_model = None
+
+
+def core_slices(workers):
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    if workers >= len(cores):
+        return [[cores[i % len(cores)]] for i in range(workers)]
+    # Sisa pembagian core dibagi ke worker pertama (mis. 10 core / 4 worker -> 3, 3, 2, 2)
+    return [[int(core) for core in part] for part in np.array_split(cores, workers)]
+
+
+def _init_embed_worker(model_name, backend, slices, counter):
+    global _worker_model
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    cores = slices[index % len(slices)]
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(len(cores))
+    _worker_model = load_encoder(model_name, backend=backend, threads=len(cores))
+
+
+def _encode_in_worker(texts):
+    return _worker_model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+
+
+def start_embed_pool(model_name, workers, backend=DEFAULT_BACKEND):
+    # spawn, bukan fork: fork setelah torch membuat thread pool bisa deadlock
+    context = multiprocessing.get_context("spawn")
+    counter = context.Value("i", 0)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_embed_worker,
+                               initargs=(model_name, backend, core_slices(workers), counter))
+
+
+def iter_encoded_batches_pool(executor, texts, batches, workers):
+    """Seperti iter_encoded_batches, tapi batch dikirim ke pool worker; hasil tetap berurutan."""
+    batches = iter(batches)
+    # Hanya sejumlah kecil batch "in flight" supaya hasil yang menunggu giliran tidak menumpuk di memori
+    pending = deque()
+    for _ in range(workers * 2):
+        batch = next(batches, None)
+        if batch is None:
+            break
+        pending.append((batch, executor.submit(_encode_in_worker, [texts[i] for i in batch])))
+
+    while pending:
+        batch, future = pending.popleft()
+        next_batch = next(batches, None)
+        if next_batch is not None:
+            pending.append((next_batch, executor.submit(_encode_in_worker, [texts[i] for i in next_batch])))
+        yield batch, future.result()
+
+
+class Embedder:
+    """
+    Model (workers=1) atau pool proses (workers>1) yang di-load sekali lalu dipakai ulang di setiap
+    panggilan encode_texts (misalnya per window). Load baru terjadi saat pertama kali dibutuhkan,
+    jadi run yang semua chunk-nya kena cache tidak pernah me-load model.
+    """
+
+    def __init__(self, model_name=EMBED_MODEL, workers=1, backend=DEFAULT_BACKEND):
+        self.model_name = model_name
+        self.workers = workers
+        self.backend = backend
+        self.model = None
+        self.tokenizer = None
+        self.max_length = None
+        self.executor = None
+
+    def load(self):
+        if self.tokenizer is not None:
+            return
+        if self.workers > 1:
+            # Proses utama cukup tokenizer untuk menghitung panjang token, model di-load di worker
+            self.tokenizer = get_tokenizer(self.model_name)
+            self.max_length = self.tokenizer.model_max_length
+            print(f"[INFO] Embedding pool: {self.workers} workers, cores per worker: "
+                  f"{'/'.join(str(len(cores)) for cores in core_slices(self.workers))}")
+            self.executor = start_embed_pool(self.model_name, self.workers, backend=self.backend)
+        else:
+            # Pakai model server kalau jalan (model sudah ter-load), kalau tidak load di proses ini
+            self.model = get_encoder(self.model_name, backend=self.backend)
+            self.tokenizer, self.max_length = self.model.tokenizer, self.model.max_seq_length
+
+    def iter_encoded(self, texts, batches):
+        if self.executor is not None:
+            return iter_encoded_batches_pool(self.executor, texts, batches, self.workers)
+        return iter_encoded_batches(self.model, texts, batches)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def encode_texts(texts, model_name=EMBED_MODEL, token_budget=EMBED_TOKEN_BUDGET, max_batch_size=EMBED_MAX_BATCH_SIZE,
+                 workers=1, backend=DEFAULT_BACKEND, cache=None, embedder=None):
+    """
+    Encode texts dengan batching berbasis token. workers > 1 memakai pool proses (lihat
+    iter_encoded_batches_pool); backend: torch | onnx | onnx-int8 (lihat encoders.py).
+    Dengan cache (EmbeddingCache), hanya teks yang belum ada di cache yang di-encode.
+    embedder (Embedder) dipakai ulang kalau diberikan, kalau tidak dibuat & ditutup di sini.
+    Return (embeddings sesuai urutan texts, stats).
+    """
+    if cache is not None:
+        return encode_texts_cached(texts, cache, model_name=model_name, token_budget=token_budget,
+                                   max_batch_size=max_batch_size, workers=workers, backend=backend, embedder=embedder)
+    if embedder is None:
+        embedder = Embedder(model_name, workers=workers, backend=backend)
+        try:
+            return encode_texts(texts, token_budget=token_budget, max_batch_size=max_batch_size, embedder=embedder)
+        finally:
+            embedder.close()
+
+    embedder.load()
+    lengths = token_lengths(texts, embedder.tokenizer, embedder.max_length)
+    batches = plan_token_batches(lengths, token_budget=token_budget, max_batch_size=max_batch_size)
+    real_tokens = sum(lengths)
+    padding = 1 - real_tokens / max(1, padded_tokens(lengths, batches))
+    old_padding = 1 - real_tokens / max(1, padded_tokens(lengths, fixed_size_batches(texts, 4)))
+    print(f"[INFO] {len(texts)} chunks, {real_tokens:,} tokens, {len(batches)} batches (budget {token_budget} token/batch).")
+    print(f"[INFO] Padding ratio: {padding:.1%} (batch_size=4 lama: {old_padding:.1%})")
+
+    encode_start = time.time()
+    embeddings = gather_embeddings(len(texts), embedder.iter_encoded(texts, batches), len(batches))
+    encode_time = time.time() - encode_start
+    print(f"[INFO] Encode: {encode_time:.2f} seconds, {real_tokens / max(encode_time, 1e-9):,.0f} tokens/s.")
+
+    stats = {"chunks": len(texts), "tokens": real_tokens, "batches": len(batches), "padding": padding,
+             "encode_time": encode_time}
+    return embeddings, stats
+
+
+def encode_texts_cached(texts, cache, **kwargs):
+    keys = [cache.key(text) for text in texts]
+    vectors = cache.get_many(keys)
+    from_cache = sum(1 for key in keys if key in vectors)
+
+    # Teks yang sama (boilerplate) bisa muncul berkali-kali di satu run, cukup di-encode sekali
+    missing = {}
+    for i, key in enumerate(keys):
+        if key not in vectors:
+            missing.setdefault(key, i)
+    print(f"[CACHE] {from_cache} / {len(texts)} chunks from cache, "
+          f"{len(missing)} new texts to encode.")
+
+    stats = {"chunks": 0, "tokens": 0, "batches": 0, "padding": 0.0, "encode_time": 0.0}
+    if missing:
+        new_embeddings, stats = encode_texts([texts[i] for i in missing.values()], **kwargs)
+        new_vectors = dict(zip(missing, new_embeddings))
+        cache.put_many(new_vectors.items())
+        vectors.update(new_vectors)
+
+    embeddings = np.stack([vectors[key] for key in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+    stats["cache_hits"] = from_cache
+    return embeddings, stats
+
+
+def meta_row(doc):
+    row = {
+        "text": doc["text"],
+        "file_name": doc.get("file_name", ""),
+        "page_number": doc.get("page_number", 0),
+        "bookmark": doc.get("bookmark", ""),
+        "text_length": doc.get("text_length", len(doc["text"])),
+        "has_tables": doc.get("has_tables", False),
+        "chapter_title": doc.get("chapter_title", ""),
+    }
+    if doc.get("duplicates"):
+        # Provenance dari dedup.py: lokasi lain chunk yang sama
+        row["duplicates"] = doc["duplicates"]
+    return row
+
+
+def iter_windows(path, window_size, skip=0):
+    rows = jsonl_io.iter_jsonl(path)
+    for _ in islice(rows, skip):
+        pass
+    while True:
+        window = list(islice(rows, window_size))
+        if not window:
+            break
+        yield window
+
+
+def generate_embeddings(token_budget=EMBED_TOKEN_BUDGET, max_batch_size=EMBED_MAX_BATCH_SIZE, workers=1,
+                        backend=DEFAULT_BACKEND, use_cache=True, dtype=EMBED_DTYPE, window_size=EMBED_WINDOW_SIZE):
+    """
+    Encode chunk per window (window_size chunk) dan tulis hasilnya langsung ke artifact, jadi memori
+    tidak tumbuh dengan ukuran korpus. Setiap window yang selesai dicatat di checkpoint; kalau task
+    gagal lalu di-retry, encode dilanjutkan dari window terakhir yang selesai (lihat ArtifactWriter).
+    """
+    start_time = time.time()
+
+    chunked_path = BASE_DIR / "data/processed/Kepdir 0306 Kepdir 2023_v7/Kepdir 0306 Kepdir 2023_ekstrak_chunked.jsonl"
+    # Input = output dedup.py (chunk kanonik); nama artifact tetap mengikuti file chunking
+    input_path = chunked_path.with_name(f"{chunked_path.stem}_dedup.jsonl")
 
-    input_path = BASE_DIR / "data/processed/Kepdir 0306 Kepdir 2023_v7/Kepdir 0306 Kepdir 2023_ekstrak_chunked.jsonl"
-    
     if not input_path.exists():
         raise FileNotFoundError(f"Input path not found: {input_path}")
-    
-    output_path = input_path.with_name(f"{input_path.stem}_embedding.jsonl")
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        documents = [json.loads(line) for line in f]
+    output_path = chunked_path.with_name(f"{chunked_path.stem}_embedding.npy")
 
-    texts = [doc["text"] for doc in documents]
-    file_names = [doc.get("file_name", "") for doc in documents]
-    page_numbers = [doc.get("page_number", 0) for doc in documents]
-    bookmarks = [doc.get("bookmark", "") for doc in documents]
-    text_lengths = [doc.get("text_length", len(doc["text"])) for doc in documents]
-    has_tables_flags = [doc.get("has_tables", False) for doc in documents]
-    chapter_titles = [doc.get("chapter_title", "") for doc in documents]
+    with open(input_path, "rb") as f:
+        n_rows = sum(1 for _ in f)
+    # Hash isi row, bukan byte file: output orjson vs json bawaan tidak boleh membatalkan checkpoint
+    params = {"input_sha256": jsonl_io.jsonl_sha256(input_path), "model": EMBED_MODEL, "revision": EMBED_MODEL_REVISION,
+              "backend": backend}
+    writer = ArtifactWriter(output_path, n_rows, params, dtype=dtype)
+    if writer.rows_done:
+        print(f"[RESUME] Melanjutkan dari checkpoint: {writer.rows_done} / {n_rows} chunks sudah di-encode.")
 
     print("Generating embeddings...")
-    model = SentenceTransformer("BAAI/bge-m3", device="cpu")
-    embeddings = model.encode(
-        texts,
-        batch_size=4,  # atau 4 jika RAM benar-benar terbatas
-        show_progress_bar=True
-    ).tolist()
-
-    with open(output_path, "w", encoding="utf-8") as out_f:
-        for i in range(len(texts)):
-            item = {
-                "embedding": embeddings[i],
-                "text": texts[i],
-                "file_name": file_names[i],
-                "page_number": page_numbers[i],
-                "bookmark": bookmarks[i],
-                "text_length": text_lengths[i],
-                "has_tables": has_tables_flags[i],
-                "chapter_title": chapter_titles[i],
-            }
-            json.dump(item, out_f, ensure_ascii=False)
-            out_f.write("\n")
+    print(f"[INFO] Encoder backend: {backend}, window {window_size} chunks")
+    # Backend ONNX int8 menghasilkan vektor yang sedikit berbeda, jadi ikut jadi bagian key cache
+    cache = EmbeddingCache(f"{EMBED_MODEL}:{backend}", revision=EMBED_MODEL_REVISION) if use_cache else None
+    embedder = Embedder(EMBED_MODEL, workers=workers, backend=backend)
+    try:
+        for documents in iter_windows(input_path, window_size, skip=writer.rows_done):
+            embeddings, _ = encode_texts([doc["text"] for doc in documents], token_budget=token_budget,
+                                         max_batch_size=max_batch_size, cache=cache, embedder=embedder)
+            writer.append(embeddings, [meta_row(doc) for doc in documents])
+            print(f"[WINDOW] {writer.rows_done} / {n_rows} chunks written.")
+    finally:
+        embedder.close()
+    # Vektor ke .npy (biner), metadata ke JSONL terpisah
+    _, meta_path = writer.finish()
 
     end_time = time.time()  # ⏱️ Selesai hitung waktu
     elapsed_time = end_time - start_time
-    print(f"Embeddings saved to {output_path}")
+    print(f"Embeddings saved to {output_path} ({dtype}, metadata: {meta_path.name})")
+    if cache is not None:
+        cache.report()
+        cache.close()
     print(f"[DONE] Embedding generation completed in {elapsed_time:.2f} seconds.")
 
     return str(output_path)
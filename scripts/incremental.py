@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+# --- Manifest per dokumen untuk proses incremental ---
+# Disimpan di samping output ekstrak: data/processed/<dokumen>/<dokumen>_manifest.json
+#   file_sha256, backend,           -> semuanya sama = ekstraksi di-skip
+#   parser_version, extractor_version
+#   pages {page_number: hash}       -> hash isi content per halaman
+#   changed_pages / removed_pages   -> halaman yang berubah dibanding run sebelumnya
+#   fingerprint                     -> hash gabungan semua halaman (versi dokumen)
+#   stages {nama: {fingerprint}}    -> fingerprint saat stage downstream terakhir jalan
+#   stages {nama: {params}}         -> versi & parameter stage itu (aturan/konstanta yang menentukan output)
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pages_fingerprint(pages):
+    digest = hashlib.sha1()
+    for page_number in sorted(pages, key=int):
+        digest.update(f"{page_number}:{pages[page_number]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def manifest_path_for(jsonl_path):
+    """Manifest dokumen untuk file output stage mana pun (..._ekstrak.jsonl, ..._ekstrak_cleansing.jsonl, dst)."""
+    jsonl_path = Path(jsonl_path)
+    stem = jsonl_path.stem
+    idx = stem.rfind("_ekstrak")
+    doc_name = stem[:idx] if idx != -1 else stem
+    return jsonl_path.parent / f"{doc_name}_manifest.json"
+
+
+def load_manifest(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    # Tulis ke file sementara lalu rename supaya manifest tidak pernah setengah jadi
+    path = Path(path)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def stage_is_current(manifest, stage, output_path, params=None):
+    """
+    True kalau stage sudah pernah jalan untuk versi dokumen ini dan output-nya masih ada.
+    Dengan params, stage juga harus terakhir jalan dengan params (versi/parameter stage) yang sama.
+    """
+    if not manifest or not manifest.get("complete") or not Path(output_path).exists():
+        return False
+    previous = manifest.get("stages", {}).get(stage, {})
+    if params is not None and previous.get("params") != params:
+        return False
+    return previous.get("fingerprint") == manifest["fingerprint"]
+
+
+def invalidate_stages(manifest, *stages):
+    """Paksa stage downstream jalan lagi (stats lama seperti params tetap disimpan untuk reuse)."""
+    for stage in stages:
+        manifest.get("stages", {}).get(stage, {}).pop("fingerprint", None)
+
+
+def mark_stage(manifest_path, manifest, stage, **stats):
+    manifest.setdefault("stages", {})[stage] = {"fingerprint": manifest["fingerprint"], **stats}
+    save_manifest(manifest_path, manifest)
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import List, TypedDict
+
+try:
+    import orjson
+except ImportError:  # fallback ke json bawaan
+    orjson = None
+
+
+# --- I/O JSONL bersama untuk semua tahap pipeline ---
+# Pakai orjson kalau terpasang (encode/decode jauh lebih cepat, terutama untuk vektor embedding
+# dan array numpy), kalau tidak fallback ke modul json bawaan. Isi datanya sama, tapi byte-nya TIDAK
+# identik: orjson menulis tanpa spasi setelah ":" dan "," (json bawaan memakai ", " dan ": "), dan
+# NaN/Infinity jadi null. Jadi jangan pernah hash/bandingkan baris/file JSONL mentah; hash content
+# (incremental.content_hash) atau pakai canonical_dumps / jsonl_sha256.
+
+class PageRecord(TypedDict, total=False):
+    # Output ekstrak.py (per halaman); cleansing.py menambah source_hash dan chapter_title
+    page_number: int
+    content: str
+    content_length: int
+    content_hash: str
+    source_hash: str
+    filename: str
+    bookmark: str
+    chapter_title: str
+    has_tables: bool
+
+
+class ChunkRecord(TypedDict, total=False):
+    # Output chunking.py (per chunk)
+    chunk_id: str
+    text: str
+    file_name: str
+    bookmark: str
+    chapter_title: str
+    page_number: int  # = page_start
+    page_start: int
+    page_end: int
+    has_tables: bool
+    text_length: int
+    char_start: int  # offset di content halaman page_start (None untuk tokenizer lambat)
+    char_end: int    # offset di content halaman page_end
+    source_hash: str
+    duplicates: List[dict]  # ditambahkan dedup.py: provenance chunk lain yang identik/near-duplicate
+
+
+class EmbeddedChunkRecord(ChunkRecord, total=False):
+    # Format embedding lama (vektor di dalam JSONL); generate_embedding.py sekarang menulis vektor ke .npy
+    # dan metadata ChunkRecord ke JSONL terpisah (lihat embedding_artifact.py)
+    embedding: List[float]
+
+
+def _default(obj):
+    # Array/skalar numpy (misalnya embedding) -> list/float biasa
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def loads(line):
+        return orjson.loads(line)
+
+    def dumps(row):
+        return orjson.dumps(row, option=_ORJSON_OPTIONS).decode("utf-8")
+
+else:
+    def loads(line):
+        return json.loads(line)
+
+    def dumps(row):
+        return json.dumps(row, ensure_ascii=False, default=_default)
+
+
+def write_row(f, row):
+    f.write(dumps(row) + "\n")
+
+
+def canonical_dumps(row):
+    """Serialisasi yang sama dengan atau tanpa orjson (untuk hashing), bukan untuk menulis output."""
+    return json.dumps(row, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=_default)
+
+
+def jsonl_sha256(path):
+    """Hash isi file JSONL (per row, canonical_dumps): tidak berubah kalau hanya serializer-nya yang beda."""
+    digest = hashlib.sha256()
+    for row in iter_jsonl(path):
+        digest.update(canonical_dumps(row).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def iter_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield loads(line)
+
+
+def read_jsonl(path):
+    return list(iter_jsonl(path))
+
+
+def write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            write_row(f, row)
+
+
+# --- Sharding untuk pemrosesan multiprocess ---
+# File JSONL dibagi per rentang byte yang selalu jatuh di awal baris, tiap worker membaca rentangnya
+# sendiri (iter_jsonl_range) dan menulis ke file shard; shard digabung lagi sesuai urutan (concat_files).
+
+def split_jsonl(path, n_shards, key=None):
+    """
+    Return list (start, end) offset byte. Kalau key diberikan (fungsi row -> nilai), batas shard
+    digeser maju sampai baris sebelum dan sesudah batas punya key berbeda, jadi baris dengan key
+    sama yang berurutan (misalnya satu section) tidak pernah terpecah ke dua shard.
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n_shards):
+            target = size * i // n_shards
+            if target <= bounds[-1]:
+                continue
+            # Lompat ke awal baris berikutnya
+            f.seek(target - 1)
+            f.readline()
+            position = f.tell()
+
+            if key is not None and position < size:
+                line = f.readline()
+                reference = key(loads(line))
+                position += len(line)
+                for line in iter(f.readline, b""):
+                    if key(loads(line)) != reference:
+                        break
+                    position += len(line)
+
+            if bounds[-1] < position < size:
+                bounds.append(position)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def iter_jsonl_range(path, start=0, end=None):
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        for line in f:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            yield loads(line)
+
+
+def shard_path(output_path, index):
+    return f"{output_path}.shard{index:03d}.tmp"
+
+
+def concat_files(paths, output_path):
+    """Gabungkan file shard sesuai urutan ke output_path lalu hapus shard-nya."""
+    with open(output_path, "wb") as outfile:
+        for path in paths:
+            with open(path, "rb") as infile:
+                shutil.copyfileobj(infile, outfile)
+            os.remove(path)
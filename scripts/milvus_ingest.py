@@ -0,0 +1,169 @@
+import os
+import queue
+import threading
+import time
+
+from pymilvus import Collection, CollectionSchema, DataType, FieldSchema, connections, utility
+
+from embedding_artifact import iter_embedding_batches
+
+# --- Ingestion Milvus bersama (insert_to_milvus.py, milvus.py, embed.py) ---
+# Record (metadata, vektor) dibaca secara streaming dan dikelompokkan per ukuran payload (byte),
+# bukan jumlah baris, supaya satu insert tidak pernah melewati batas pesan gRPC Milvus (default 64 MB).
+# Pembentukan batch berikutnya (baca mmap / encode + konversi ke list) berjalan di thread latar,
+# bersamaan dengan insert batch sekarang ke Milvus.
+
+MILVUS_HOST = "localhost"
+MILVUS_PORT = "19530"
+MILVUS_BATCH_BYTES = int(float(os.environ.get("MILVUS_BATCH_MB", "16")) * 1024 * 1024)
+# Jumlah batch yang sudah jadi dan menunggu insert
+PREFETCH_BATCHES = 2
+
+FIELDS = ["text", "embedding", "file_name", "page_number", "bookmark", "text_length", "has_tables", "chapter_title"]
+
+
+def collection_schema(dim, description="PLN Embeddings"):
+    return CollectionSchema([
+        FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+        FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=65535),
+        FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=dim),
+        FieldSchema(name="file_name", dtype=DataType.VARCHAR, max_length=512),
+        FieldSchema(name="page_number", dtype=DataType.INT64),
+        FieldSchema(name="bookmark", dtype=DataType.VARCHAR, max_length=1024),
+        FieldSchema(name="text_length", dtype=DataType.INT64),
+        FieldSchema(name="has_tables", dtype=DataType.BOOL),
+        FieldSchema(name="chapter_title", dtype=DataType.VARCHAR, max_length=1024),
+    ], description=description)
+
+
+def ensure_collection(collection_name, dim, drop_existing=False, description="PLN Embeddings"):
+    if drop_existing and collection_name in utility.list_collections():
+        print(f"[INFO] Dropping existing collection: {collection_name}")
+        utility.drop_collection(collection_name)
+
+    if collection_name in utility.list_collections():
+        return Collection(collection_name)
+
+    print(f"[INFO] Membuat collection baru: {collection_name}")
+    collection = Collection(name=collection_name, schema=collection_schema(dim, description))
+    collection.create_index(
+        field_name="embedding",
+        index_params={"metric_type": "COSINE", "index_type": "IVF_FLAT", "params": {"nlist": 128}}
+    )
+    return collection
+
+
+def record_bytes(row, dim):
+    # Perkiraan ukuran payload: vektor float32 + string UTF-8 + 2 int64 + 1 bool
+    strings = row["text"], row["file_name"], row["bookmark"], row["chapter_title"]
+    return dim * 4 + sum(len(value.encode("utf-8")) for value in strings) + 17
+
+
+def iter_artifact_records(vectors_path, read_size=1000):
+    """Yield (row metadata, vektor float32) dari artifact embedding (.npy dibaca lewat mmap)."""
+    for rows, vectors in iter_embedding_batches(vectors_path, batch_size=read_size):
+        yield from zip(rows, vectors)
+
+
+def iter_byte_batches(records, max_bytes=MILVUS_BATCH_BYTES):
+    """Kelompokkan record jadi batch kolom siap insert, tiap batch <= max_bytes (minimal 1 record)."""
+    columns = {field: [] for field in FIELDS}
+    size = 0
+    for row, vector in records:
+        row_size = record_bytes(row, len(vector))
+        if columns["text"] and size + row_size > max_bytes:
+            yield columns, size
+            columns = {field: [] for field in FIELDS}
+            size = 0
+        columns["text"].append(row["text"])
+        columns["embedding"].append(vector.tolist())
+        columns["file_name"].append(row["file_name"])
+        columns["page_number"].append(row["page_number"])
+        columns["bookmark"].append(row["bookmark"])
+        columns["text_length"].append(row["text_length"])
+        columns["has_tables"].append(row["has_tables"])
+        columns["chapter_title"].append(row["chapter_title"])
+        size += row_size
+    if columns["text"]:
+        yield columns, size
+
+
+def iter_prefetched(iterable, prefetch=PREFETCH_BATCHES):
+    """Jalankan iterable di thread latar; error di thread itu di-raise ulang di pemanggil."""
+    buffer = queue.Queue(maxsize=prefetch)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    return
+                buffer.put(item)
+        except BaseException as e:
+            buffer.put(e)
+            return
+        buffer.put(done)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Kosongkan antrian supaya producer yang sedang menunggu put() bisa selesai
+        while thread.is_alive():
+            try:
+                buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def ingest(records, collection_name, max_bytes=MILVUS_BATCH_BYTES, drop_existing=False, description="PLN Embeddings"):
+    """
+    Insert record (row metadata, vektor) ke collection_name. Collection dibuat dari dimensi vektor
+    batch pertama kalau belum ada. Return (collection, stats).
+    """
+    connections.connect("default", host=MILVUS_HOST, port=MILVUS_PORT)
+
+    start_time = time.time()
+    collection = None
+    rows = 0
+    total_bytes = 0
+    insert_time = 0.0
+    for n, (columns, size) in enumerate(iter_prefetched(iter_byte_batches(records, max_bytes)), 1):
+        if collection is None:
+            collection = ensure_collection(collection_name, len(columns["embedding"][0]), drop_existing=drop_existing,
+                                           description=description)
+
+        insert_start = time.time()
+        collection.insert([columns[field] for field in FIELDS])
+        insert_time += time.time() - insert_start
+
+        rows += len(columns["text"])
+        total_bytes += size
+        elapsed = max(time.time() - start_time, 1e-9)
+        print(f"[BATCH] {n}: {len(columns['text'])} rows, {size / 1e6:.1f} MB | total {rows} rows, "
+              f"{rows / elapsed:,.0f} rows/s, {total_bytes / 1e6 / elapsed:.1f} MB/s")
+
+    if collection is None:
+        print("[INFO] Tidak ada data untuk di-insert.")
+        return None, {"rows": 0, "bytes": 0, "seconds": 0.0}
+
+    collection.load()
+    elapsed = max(time.time() - start_time, 1e-9)
+    stats = {"rows": rows, "bytes": total_bytes, "seconds": elapsed, "insert_seconds": insert_time}
+    print(f"[INFO] {rows} rows ({total_bytes / 1e6:.1f} MB) -> {collection_name}: {rows / elapsed:,.0f} rows/s, "
+          f"{total_bytes / 1e6 / elapsed:.1f} MB/s (insert {insert_time:.1f} s dari {elapsed:.1f} s).")
+    return collection, stats
+
+
+def ingest_artifact(vectors_path, collection_name, max_bytes=MILVUS_BATCH_BYTES, drop_existing=False):
+    return ingest(iter_artifact_records(vectors_path), collection_name, max_bytes=max_bytes,
+                  drop_existing=drop_existing)
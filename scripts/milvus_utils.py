@@ -1,7 +1,7 @@
 from pymilvus import Collection
-from sentence_transformers import SentenceTransformer
+from model_client import get_encoder
 
-model = SentenceTransformer("intfloat/multilingual-e5-large", device="cpu")
+model = get_encoder("intfloat/multilingual-e5-large")
 collection = Collection("pln_embeddings_simplified")
 
 # ======================
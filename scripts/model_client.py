@@ -0,0 +1,91 @@
+import base64
+import json
+import os
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+# --- Client tipis untuk model_server.py ---
+# get_encoder / get_tokenizer memakai server kalau sedang jalan (model sudah ter-load, cold start
+# hampir nol) dan fallback ke load di proses sendiri kalau tidak. Objek remote punya interface yang
+# sama dengan encoder/tokenizer lokal yang dipakai pipeline (encode, tokenizer, max_seq_length, __call__).
+MODEL_SERVER_HOST = "127.0.0.1"
+MODEL_SERVER_PORT = int(os.environ.get("MODEL_SERVER_PORT", "8765"))
+MODEL_SERVER_URL = os.environ.get("MODEL_SERVER_URL", f"http://{MODEL_SERVER_HOST}:{MODEL_SERVER_PORT}")
+# MODEL_SERVER=off memaksa load lokal
+USE_MODEL_SERVER = os.environ.get("MODEL_SERVER", "auto") != "off"
+
+
+def _request(url, payload=None, timeout=None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"Model server error: {json.loads(e.read()).get('error')}") from None
+
+
+def server_available(url=MODEL_SERVER_URL, timeout=0.5):
+    if not USE_MODEL_SERVER:
+        return False
+    try:
+        return _request(f"{url}/health", timeout=timeout).get("status") == "ok"
+    except (OSError, ValueError):
+        return False
+
+
+class RemoteTokenizer:
+    def __init__(self, model_name, url=MODEL_SERVER_URL):
+        self.model_name = model_name
+        self.url = url
+        info = _request(f"{url}/tokenize", {"model": model_name})
+        self.is_fast = info["is_fast"]
+        self.model_max_length = info["model_max_length"]
+
+    def __call__(self, text, **kwargs):
+        result = _request(f"{self.url}/tokenize", {"model": self.model_name, "text": text, "kwargs": kwargs})
+        return result["encoding"]
+
+
+class RemoteEncoder:
+    def __init__(self, model_name, backend=None, url=MODEL_SERVER_URL):
+        self.model_name = model_name
+        self.backend = backend
+        self.url = url
+        self.tokenizer = RemoteTokenizer(model_name, url=url)
+        self.max_seq_length = self.tokenizer.model_max_length
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, show_progress_bar=False, **kwargs):
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size, normalize_embeddings)[0]
+        result = _request(f"{self.url}/encode", {
+            "model": self.model_name,
+            "backend": self.backend,
+            "texts": list(texts),
+            "batch_size": batch_size,
+            "normalize_embeddings": normalize_embeddings,
+        })
+        vectors = np.frombuffer(base64.b64decode(result["data"]), dtype=result["dtype"]).reshape(result["shape"])
+        # frombuffer read-only; pemanggil (seperti hasil SentenceTransformer) boleh mengubah array
+        return vectors.copy()
+
+
+def get_encoder(model_name, backend=None):
+    if server_available():
+        print(f"[INFO] Using model server {MODEL_SERVER_URL} for {model_name}")
+        return RemoteEncoder(model_name, backend=backend)
+    from encoders import load_encoder
+    return load_encoder(model_name, backend=backend)
+
+
+def get_tokenizer(model_name):
+    if server_available():
+        tokenizer = RemoteTokenizer(model_name)
+        # Chunking butuh offset mapping; tokenizer lambat tetap di-load lokal (punya decode)
+        if tokenizer.is_fast:
+            print(f"[INFO] Using model server {MODEL_SERVER_URL} for {model_name} tokenizer")
+            return tokenizer
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_name)
@@ -0,0 +1,146 @@
+import argparse
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from encoders import DEFAULT_BACKEND, load_encoder
+from model_client import MODEL_SERVER_HOST, MODEL_SERVER_PORT
+
+# --- Server model lokal (long-lived) ---
+# Setiap model/tokenizer di-load sekali lalu dipakai semua script & task DAG lewat model_client.py,
+# jadi script query tidak perlu menunggu load model ~30 detik dan tidak memakan RAM model sendiri.
+# Hanya listen di localhost.
+#   GET  /health    -> {"status": "ok", "encoders": [...], "tokenizers": [...]}
+#   POST /encode    -> {"model", "backend", "texts", "batch_size", "normalize_embeddings"}
+#                      => {"shape", "dtype", "data": base64 float32}
+#   POST /tokenize  -> {"model", "text": str | list, "kwargs": {...}} => {"encoding", "is_fast", "model_max_length"}
+# Contoh:
+#   python scripts/model_server.py --preload BAAI/bge-m3 intfloat/multilingual-e5-large
+
+_encoders = {}
+_tokenizers = {}
+# Satu lock per model: request paralel ke model yang sama dijalankan bergantian
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def _lock_for(key):
+    with _registry_lock:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def get_server_encoder(model_name, backend):
+    key = ("encoder", model_name, backend)
+    with _lock_for(key):
+        if key not in _encoders:
+            start_time = time.time()
+            _encoders[key] = load_encoder(model_name, backend=backend)
+            print(f"[INFO] Loaded encoder {model_name} ({backend}) in {time.time() - start_time:.1f} seconds.")
+    return _encoders[key]
+
+
+def get_server_tokenizer(model_name):
+    key = ("tokenizer", model_name)
+    with _lock_for(key):
+        if key not in _tokenizers:
+            from transformers import AutoTokenizer
+            _tokenizers[key] = AutoTokenizer.from_pretrained(model_name)
+            print(f"[INFO] Loaded tokenizer {model_name}.")
+    return _tokenizers[key]
+
+
+def encode(payload):
+    model_name = payload["model"]
+    backend = payload.get("backend") or DEFAULT_BACKEND
+    encoder = get_server_encoder(model_name, backend)
+    with _lock_for(("run", model_name, backend)):
+        embeddings = encoder.encode(payload["texts"], batch_size=payload.get("batch_size", 32),
+                                    normalize_embeddings=payload.get("normalize_embeddings", False),
+                                    show_progress_bar=False)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    return {
+        "shape": list(embeddings.shape),
+        "dtype": "float32",
+        "data": base64.b64encode(embeddings.tobytes()).decode("ascii"),
+    }
+
+
+def tokenize(payload):
+    tokenizer = get_server_tokenizer(payload["model"])
+    kwargs = {key: value for key, value in payload.get("kwargs", {}).items() if key != "return_tensors"}
+    # Rust tokenizer tidak aman dipanggil paralel kalau setting truncation/padding berubah antar call
+    with _lock_for(("run", payload["model"])):
+        encoding = dict(tokenizer(payload["text"], **kwargs)) if "text" in payload else {}
+    return {
+        "encoding": encoding,
+        "is_fast": getattr(tokenizer, "is_fast", False),
+        "model_max_length": tokenizer.model_max_length,
+    }
+
+
+ROUTES = {"/encode": encode, "/tokenize": tokenize}
+
+
+class ModelRequestHandler(BaseHTTPRequestHandler):
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        self.send_json(200, {
+            "status": "ok",
+            "encoders": [f"{model}:{backend}" for _, model, backend in _encoders],
+            "tokenizers": [model for _, model in _tokenizers],
+        })
+
+    def do_POST(self):
+        handler = ROUTES.get(self.path)
+        if handler is None:
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            self.send_json(200, handler(payload))
+        except Exception as e:
+            self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        # Log per request terlalu ramai untuk panggilan tokenize dari chunking
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server model embedding/tokenizer lokal")
+    parser.add_argument("--host", default=MODEL_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=MODEL_SERVER_PORT)
+    parser.add_argument("--backend", default=DEFAULT_BACKEND)
+    parser.add_argument("--preload", nargs="*", default=[], help="model yang di-load saat start")
+    args = parser.parse_args()
+
+    for model_name in args.preload:
+        get_server_encoder(model_name, args.backend)
+        get_server_tokenizer(model_name)
+
+    server = ThreadingHTTPServer((args.host, args.port), ModelRequestHandler)
+    print(f"[INFO] Model server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import pdfplumber
+
+
+# --- Backend ekstraksi PDF ---
+# Semua backend punya interface yang sama:
+#   len(backend), backend.extract_text(page_num), backend.extract_tables(page_num),
+#   backend.count_rulings(page_num), backend.release(page_num), backend.close()
+# page_num selalu 1-based. Backend cepat (pypdfium2 / PyMuPDF) hanya dipakai untuk teks;
+# tabel tetap diambil lewat pdfplumber yang dibuka secara lazy, jadi pdfplumber hanya
+# jalan untuk halaman yang memang butuh ekstraksi tabel.
+
+class PdfplumberBackend:
+    name = "pdfplumber"
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.pdf = pdfplumber.open(file_path)
+
+    def __len__(self):
+        return len(self.pdf.pages)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def extract_text(self, page_num):
+        return self.pdf.pages[page_num - 1].extract_text()
+
+    def extract_tables(self, page_num):
+        return self.pdf.pages[page_num - 1].extract_tables()
+
+    def count_rulings(self, page_num):
+        # Strategi default extract_tables ("lines") hanya memakai edge dari line/rect/curve
+        page = self.pdf.pages[page_num - 1]
+        return len(page.lines) + len(page.rects) + len(page.curves)
+
+    def release(self, page_num):
+        # Halaman sudah selesai diproses: buang cache objek/layout pdfplumber-nya
+        if self.pdf is not None:
+            self.pdf.pages[page_num - 1].close()
+
+    def close(self):
+        self.pdf.close()
+
+
+class _FastTextBackend(PdfplumberBackend):
+    """Basis backend native: teks dari engine cepat, tabel dari pdfplumber (lazy)."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.pdf = None
+
+    def extract_tables(self, page_num):
+        if self.pdf is None:
+            self.pdf = pdfplumber.open(self.file_path)
+        return super().extract_tables(page_num)
+
+    def close(self):
+        if self.pdf is not None:
+            self.pdf.close()
+            self.pdf = None
+
+
+def _normalize_newlines(text):
+    # Samakan format dengan pdfplumber: pemisah baris "\n", tanpa newline di akhir
+    return text.replace("\r\n", "\n").replace("\r", "\n").rstrip("\n")
+
+
+class PypdfiumBackend(_FastTextBackend):
+    name = "pypdfium2"
+
+    def __init__(self, file_path):
+        import pypdfium2 as pdfium
+
+        super().__init__(file_path)
+        self.doc = pdfium.PdfDocument(file_path)
+
+    def __len__(self):
+        return len(self.doc)
+
+    def extract_text(self, page_num):
+        page = self.doc[page_num - 1]
+        textpage = page.get_textpage()
+        try:
+            return _normalize_newlines(textpage.get_text_range())
+        finally:
+            textpage.close()
+            page.close()
+
+    def count_rulings(self, page_num):
+        import pypdfium2.raw as pdfium_c
+
+        page = self.doc[page_num - 1]
+        try:
+            return sum(1 for _ in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_PATH,)))
+        finally:
+            page.close()
+
+    def close(self):
+        super().close()
+        self.doc.close()
+
+
+class PymupdfBackend(_FastTextBackend):
+    name = "pymupdf"
+
+    def __init__(self, file_path):
+        import fitz
+
+        super().__init__(file_path)
+        self.doc = fitz.open(file_path)
+
+    def __len__(self):
+        return self.doc.page_count
+
+    def extract_text(self, page_num):
+        return _normalize_newlines(self.doc[page_num - 1].get_text("text"))
+
+    def count_rulings(self, page_num):
+        return len(self.doc[page_num - 1].get_drawings())
+
+    def close(self):
+        super().close()
+        self.doc.close()
+
+
+BACKENDS = {
+    PdfplumberBackend.name: PdfplumberBackend,
+    PypdfiumBackend.name: PypdfiumBackend,
+    PymupdfBackend.name: PymupdfBackend,
+}
+
+
+def open_backend(name, file_path):
+    if name not in BACKENDS:
+        raise ValueError(f"Backend PDF tidak dikenal: {name} (pilihan: {', '.join(BACKENDS)})")
+    return BACKENDS[name](file_path)
@@ -1,11 +1,11 @@
 from pymilvus import connections, Collection
-from sentence_transformers import SentenceTransformer
+from model_client import get_encoder
 
 # 1. Koneksi ke Milvus
 connections.connect("default", host="localhost", port="19530")
 
 # 2. Load model
-model = SentenceTransformer("intfloat/multilingual-e5-large", device='cpu')
+model = get_encoder("intfloat/multilingual-e5-large")
 
 # 3. Load collection
 collection = Collection("pln_embeddings_simplified")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Script di scripts/ saling import secara flat (import jsonl_io, dst), sama seperti saat dijalankan Airflow
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
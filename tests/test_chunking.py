@@ -0,0 +1,60 @@
+import io
+import json
+import re
+
+from chunking import chunk_rows
+
+
+class WhitespaceTokenizer:
+    """Fast tokenizer palsu: satu token per kata, dengan offset mapping & overflow seperti tokenizer HF."""
+
+    is_fast = True
+
+    def __call__(self, texts, max_length=450, stride=0, **kwargs):
+        inputs = {"input_ids": [], "offset_mapping": [], "overflow_to_sample_mapping": []}
+        for sample_idx, text in enumerate(texts):
+            spans = [match.span() for match in re.finditer(r"\S+", text)]
+            start = 0
+            while True:
+                window = spans[start:start + max_length]
+                inputs["input_ids"].append(list(range(len(window))))
+                inputs["offset_mapping"].append(window)
+                inputs["overflow_to_sample_mapping"].append(sample_idx)
+                if start + max_length >= len(spans):
+                    break
+                start += max_length - stride
+        return inputs
+
+
+def page(page_number, words, has_tables=False):
+    return {
+        "filename": "doc.pdf",
+        "bookmark": "BAB I",
+        "chapter_title": "PENDAHULUAN",
+        "page_number": page_number,
+        "content": " ".join(f"p{page_number}w{i}" for i in range(words)),
+        "has_tables": has_tables,
+    }
+
+
+def test_packed_chunks_only_flag_tables_from_their_own_pages():
+    rows = [page(1, 10), page(2, 10, has_tables=True), page(3, 10), page(4, 10)]
+    outfile = io.StringIO()
+    chunk_rows(rows, outfile, WhitespaceTokenizer(), {}, max_tokens=10, overlap=0, pack_pages=True)
+    chunks = [json.loads(line) for line in outfile.getvalue().splitlines()]
+
+    # Satu unit (section sama), satu chunk per halaman
+    assert [(chunk["page_start"], chunk["page_end"]) for chunk in chunks] == [(1, 1), (2, 2), (3, 3), (4, 4)]
+    assert [chunk["has_tables"] for chunk in chunks] == [False, True, False, False]
+
+
+def test_chunk_spanning_tabled_page_is_flagged():
+    rows = [page(1, 6), page(2, 6, has_tables=True), page(3, 6)]
+    outfile = io.StringIO()
+    chunk_rows(rows, outfile, WhitespaceTokenizer(), {}, max_tokens=9, overlap=0, pack_pages=True)
+    chunks = [json.loads(line) for line in outfile.getvalue().splitlines()]
+
+    assert [(chunk["page_start"], chunk["page_end"], chunk["has_tables"]) for chunk in chunks] == [
+        (1, 2, True),
+        (2, 3, True),
+    ]
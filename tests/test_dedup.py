@@ -0,0 +1,36 @@
+import json
+
+from dedup import dedup_corpus
+
+BOILERPLATE = ("Yang dimaksud dengan Pegawai adalah setiap orang yang bekerja pada Perusahaan "
+               "berdasarkan perjanjian kerja dan menerima upah sesuai ketentuan yang berlaku")
+
+
+def write_chunks(path, file_name, texts):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, text in enumerate(texts):
+            row = {"chunk_id": f"{file_name}_{i}", "text": text, "file_name": file_name, "page_start": i + 1,
+                   "page_end": i + 1}
+            f.write(json.dumps(row) + "\n")
+
+
+def read_chunks(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_chunk_shared_between_documents_is_kept_once(tmp_path):
+    first, second = tmp_path / "a_ekstrak_chunked.jsonl", tmp_path / "b_ekstrak_chunked.jsonl"
+    write_chunks(first, "a.pdf", [BOILERPLATE, "Talenta dinilai setiap semester oleh komite talenta unit induk"])
+    write_chunks(second, "b.pdf", ["Prosedur mutasi pegawai diajukan oleh atasan langsung", BOILERPLATE])
+    outputs = [tmp_path / "a_dedup.jsonl", tmp_path / "b_dedup.jsonl"]
+
+    stats = dedup_corpus([str(first), str(second)], [str(path) for path in outputs])
+
+    assert stats["exact"] == 1
+    kept_first, kept_second = map(read_chunks, outputs)
+    assert [row["chunk_id"] for row in kept_first] == ["a.pdf_0", "a.pdf_1"]
+    assert [row["chunk_id"] for row in kept_second] == ["b.pdf_0"]
+    assert kept_first[0]["duplicates"] == [
+        {"chunk_id": "b.pdf_1", "file_name": "b.pdf", "page_start": 2, "page_end": 2, "similarity": 1.0}
+    ]
@@ -0,0 +1,27 @@
+import json
+
+import jsonl_io
+
+ROWS = [
+    {"chunk_id": "a.pdf_BAB I_0", "text": "Pegawai – Direksi “PLN”", "page_start": 1, "has_tables": False},
+    {"chunk_id": "a.pdf_BAB I_1", "text": "Tabel 1", "page_start": 2, "has_tables": True, "duplicates": []},
+]
+
+
+def test_jsonl_sha256_does_not_depend_on_serializer(tmp_path):
+    orjson_style = tmp_path / "compact.jsonl"
+    json_style = tmp_path / "spaced.jsonl"
+    orjson_style.write_text("".join(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n" for row in ROWS),
+                            encoding="utf-8")
+    json_style.write_text("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in ROWS), encoding="utf-8")
+
+    assert orjson_style.read_bytes() != json_style.read_bytes()
+    assert jsonl_io.jsonl_sha256(orjson_style) == jsonl_io.jsonl_sha256(json_style)
+
+
+def test_jsonl_sha256_changes_with_content(tmp_path):
+    path = tmp_path / "chunks.jsonl"
+    jsonl_io.write_jsonl(path, ROWS)
+    before = jsonl_io.jsonl_sha256(path)
+    jsonl_io.write_jsonl(path, [ROWS[0], {**ROWS[1], "text": "Tabel 2"}])
+    assert jsonl_io.jsonl_sha256(path) != before